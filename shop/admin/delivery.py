@@ -41,6 +41,9 @@ class OrderItemForm(models.ModelForm):
         """
         Returns the quantity already delivered for this order item.
         """
+        if hasattr(instance, 'delivered_quantity'):
+            # annotated by `OrderItemInlineDelivery.get_queryset()`
+            return instance.delivered_quantity or 0
         aggr = instance.deliver_item.aggregate(delivered=Sum('quantity'))
         return aggr['delivered'] or 0
 
@@ -59,6 +62,9 @@ class OrderItemForm(models.ModelForm):
 
 
 class OrderItemInlineDelivery(OrderItemInline):
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(delivered_quantity=Sum('deliver_item__quantity'))
+
     def get_fields(self, request, obj=None):
         fields = list(super().get_fields(request, obj))
         if obj:
@@ -215,6 +221,12 @@ class DeliveryOrderAdminMixin:
         })
         return HttpResponse(content)
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if hasattr(self.model, 'unfulfilled_items'):
+            queryset = queryset.with_unfulfilled_items()
+        return queryset
+
     def get_inline_instances(self, request, obj=None):
         assert obj is not None, "An Order object can not be added through the Django-Admin"
         assert hasattr(obj, 'associate_with_delivery'), "Add 'shop.shipping.workflows.SimpleShippingWorkflowMixin' " \
@@ -158,7 +158,7 @@ class BaseOrderAdmin(FSMTransitionMixin, admin.ModelAdmin):
         return False
 
     def render_as_html_extra(self, obj):
-        return self.extra_template.render(obj.extra)
+        return self.extra_template.render(dict(obj.extra, rows=obj.extra_rows))
     render_as_html_extra.short_description = pgettext_lazy('admin', "Extra data")
 
     def get_customer_link(self, obj):
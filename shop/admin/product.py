@@ -101,8 +101,8 @@ class CMSPageAsCategoryMixin:
 
 class SearchProductIndexMixin:
     """
-    If Elasticsearch is used to create a full text search index, add this mixin class to Django's
-    ``ModelAdmin`` backend for the corresponding product model.
+    If a search backend is used to create a full text search index, add this mixin class to
+    Django's ``ModelAdmin`` backend for the corresponding product model.
     """
     def save_model(self, request, product, form, change):
         super().save_model(request, product, form, change)
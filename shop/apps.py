@@ -3,6 +3,7 @@ import warnings
 from django.conf import settings
 from django.apps import AppConfig
 from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.translation import gettext_lazy as _
 
 
@@ -17,7 +18,17 @@ class ShopConfig(AppConfig):
         from shop.models.fields import JSONField
         from shop.rest.fields import JSONSerializerField
         from shop.patches import PageAttribute
+        from shop.models.notification import Notification, NotificationAttachment, invalidate_notification_rules
+        from shop.models.order import (OrderModel, OrderPayment, backfill_amount_paid, track_loaded_order,
+                                       update_amount_paid)
+        from shop.pages import invalidate_page_urls
+        from shop.models.related import (BaseProductPage, invalidate_product_page_urls,
+                                         invalidate_published_page_urls)
+        from shop.search.base import remember_product_version
+        from cms.signals import post_publish, post_unpublish
         from cms.templatetags import cms_tags
+        from django.db.models.signals import post_delete, post_init, post_migrate, post_save
+        from post_office.models import EmailTemplate
 
         # add JSONField to the map of customized serializers
         ModelSerializer.serializer_field_mapping[JSONField] = JSONSerializerField
@@ -27,6 +38,36 @@ class ShopConfig(AppConfig):
 
         cms_tags.register.tags['page_attribute'] = PageAttribute
 
+        # keep the cached canonical URLs of products in sync with their categories
+        try:
+            ProductPageModel = BaseProductPage._materialized_model
+        except ImproperlyConfigured:
+            pass  # this shop does not assign products to CMS pages
+        else:
+            post_publish.connect(invalidate_published_page_urls)
+            post_unpublish.connect(invalidate_published_page_urls)
+            post_save.connect(invalidate_product_page_urls, sender=ProductPageModel)
+            post_delete.connect(invalidate_product_page_urls, sender=ProductPageModel)
+
+        # remember the version of each saved product, to detect outdated search results
+        post_save.connect(remember_product_version)
+
+        # keep the cached URLs of the pages referred to by the shop in sync with the CMS
+        post_publish.connect(invalidate_page_urls)
+        post_unpublish.connect(invalidate_page_urls)
+
+        # keep the amount paid stored on each order in sync with its payments
+        post_save.connect(update_amount_paid, sender=OrderPayment)
+        post_delete.connect(update_amount_paid, sender=OrderPayment)
+        post_init.connect(track_loaded_order, sender=OrderModel._materialized_model)
+        post_save.connect(track_loaded_order, sender=OrderModel._materialized_model)
+        post_migrate.connect(backfill_amount_paid, sender=self)
+
+        # keep the notification rules used when an order performs a transition in sync
+        for model in (Notification, NotificationAttachment, EmailTemplate):
+            post_save.connect(invalidate_notification_rules, sender=model)
+            post_delete.connect(invalidate_notification_rules, sender=model)
+
         if callable(getattr(cache, 'delete_pattern', None)):
             self.cache_supporting_wildcard = True
         else:
@@ -1,32 +1,88 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _, override
 
 from cms.menu_bases import CMSAttachMenu
 from menus.base import NavigationNode
 from menus.menu_pool import menu_pool
 
+from shop.conf import app_settings
+from shop.models.product import ProductModel
+from shop.models.related import ProductPageModel
+
+
+def get_cache_key(page_id, language):
+    return 'catalog_menu:{0}|{1}'.format(page_id, language)
+
+
+def invalidate_catalog_menus(page_ids):
+    """
+    Remove the cached nodes of the catalog menus attached to the given CMS pages in all languages.
+    """
+    if settings.USE_I18N:
+        languages = [language for language, _ in settings.LANGUAGES]
+    else:
+        languages = [settings.LANGUAGE_CODE]
+    cache.delete_many([get_cache_key(page_id, lang) for page_id in page_ids for lang in languages])
+
 
 class CatalogMenu(CMSAttachMenu):
+    """
+    Menu listing all products assigned to the CMS page this menu is attached to. The entries of
+    each menu are cached per page and language and invalidated whenever a product, its categories
+    or the CMS page changes.
+    """
     name = _("Catalog Menu")
 
     def get_nodes(self, request):
         try:
             if self.instance.publisher_is_draft:
-                productpage_set = self.instance.publisher_public.productpage_set
+                page_id = self.instance.publisher_public.pk
             else:
-                productpage_set = self.instance.productpage_set
+                page_id = self.instance.pk
         except AttributeError:
             return []
+        language = request.LANGUAGE_CODE
+        cache_key = get_cache_key(page_id, language)
+        entries = cache.get(cache_key)
+        if entries is None:
+            with override(language):
+                entries = self.get_entries(page_id, language)
+            cache.set(cache_key, entries, app_settings.CACHE_DURATIONS['catalog_menu'])
         nodes = []
-        with override(request.LANGUAGE_CODE):
-            for id, productpage in enumerate(productpage_set.all(), 1):
-                node = NavigationNode(
-                    title=productpage.product.product_name,
-                    url=productpage.product.get_absolute_url(),
-                    id=id,
-                )
-                if hasattr(productpage.product, 'slug'):
-                    node.path = productpage.product.slug
-                nodes.append(node)
+        for id, (title, url, slug) in enumerate(entries, 1):
+            node = NavigationNode(title=title, url=url, id=id)
+            if slug:
+                node.path = slug
+            nodes.append(node)
         return nodes
 
+    def get_entries(self, page_id, language):
+        """
+        Return a list of ``(title, url, slug)`` tuples, one for each product assigned to the given
+        page. Names and slugs are fetched using one single query and the URLs are resolved in bulk.
+        """
+        product_pages = ProductPageModel.objects.filter(page_id=page_id)
+        get_field_path = ProductModel.get_field_path
+        resolve_urls = getattr(ProductModel, 'resolve_absolute_urls', None)
+        if not callable(resolve_urls) or not get_field_path('product_name') or not get_field_path('slug'):
+            return [(
+                productpage.product.product_name,
+                productpage.product.get_absolute_url(),
+                getattr(productpage.product, 'slug', None),
+            ) for productpage in product_pages.select_related('product')]
+
+        fields = ['product__' + get_field_path('product_name'), 'product__' + get_field_path('slug')]
+        translated = any(field.startswith('product__translations__') for field in fields)
+        if translated:
+            fields.append('product__translations__language_code')
+        products = {}
+        for product_id, name, slug, *language_code in product_pages.values_list('product_id', *fields):
+            # prefer the requested translation, otherwise fall back onto any other language
+            if not translated or language_code[0] == language or product_id not in products:
+                products[product_id] = name, slug
+        slugs = {pk: slug for pk, (_, slug) in products.items()}
+        urls = resolve_urls(list(products.keys()), language, slugs=slugs)
+        return [(name, urls[pk], slug) for pk, (name, slug) in products.items()]
+
 menu_pool.register_menu(CatalogMenu)
@@ -257,6 +257,18 @@ class DefaultSettings:
         order_workflows = self._setting('SHOP_ORDER_WORKFLOWS', [])
         return [import_string(mc) for mc in order_workflows]
 
+    @property
+    def SHOP_NOTIFICATION_WORKERS(self):
+        """
+        Emails notifying about a transition of an order are rendered and handed over to the
+        Post-Office by a pool of background threads, after the transaction performing the
+        transition has been committed. This setting specifies the number of threads in that pool,
+        the default is 2.
+
+        If set to ``0``, those emails are prepared synchronously while performing the transition.
+        """
+        return self._setting('SHOP_NOTIFICATION_WORKERS', 2)
+
     @property
     def SHOP_ADD2CART_NG_MODEL_OPTIONS(self):
         """
@@ -307,12 +319,17 @@ class DefaultSettings:
     def SHOP_CACHE_DURATIONS(self):
         """
         In the product's list views, HTML snippets are created for the summary representation of
-        each product.
+        each product. Additionally the canonical URL of each product, the nodes of the catalog
+        menu and the URLs of the CMS pages referred to by the shop, such as the cart, are cached
+        per language.
 
-        By default these snippet are cached for one day.
+        By default these snippets, URLs and menu nodes are cached for one day.
         """
         result = self._setting('SHOP_CACHE_DURATIONS') or {}
         result.setdefault('product_html_snippet', 86400)
+        result.setdefault('product_url', 86400)
+        result.setdefault('catalog_menu', 86400)
+        result.setdefault('page_url', 86400)
         return result
 
     @property
@@ -346,6 +363,77 @@ class DefaultSettings:
         cascade_forms.update(self._setting('SHOP_CASCADE_FORMS', {}))
         return cascade_forms
 
+    @property
+    def SHOP_EVENT_BACKEND(self):
+        """
+        The backend used to inform separately running worker engines about events, such as queued
+        emails. Defaults to :class:`shop.events.RedisEventBackend` if ``redis`` is installed and
+        setting ``SESSION_REDIS`` is configured, otherwise to :class:`shop.events.NullEventBackend`.
+        In tests use :class:`shop.events.InMemoryEventBackend`.
+        """
+        from django.utils.module_loading import import_string
+
+        try:
+            import redis  # noqa: F401
+        except ImportError:
+            default = 'shop.events.NullEventBackend'
+        else:
+            if self._setting('SESSION_REDIS'):
+                default = 'shop.events.RedisEventBackend'
+            else:
+                default = 'shop.events.NullEventBackend'
+        return import_string(self._setting('SHOP_EVENT_BACKEND', default))
+
+    @property
+    def SHOP_SEARCH_BACKEND(self):
+        """
+        The backend used to index and search for products. Defaults to
+        :class:`shop.search.backends.ElasticsearchBackend` if ``django-elasticsearch-dsl`` is
+        installed, otherwise to :class:`shop.search.embedded.EmbeddedSearchBackend`.
+        """
+        from django.utils.module_loading import import_string
+
+        try:
+            import django_elasticsearch_dsl  # noqa: F401
+        except ImportError:
+            default = 'shop.search.embedded.EmbeddedSearchBackend'
+        else:
+            default = 'shop.search.backends.ElasticsearchBackend'
+        return import_string(self._setting('SHOP_SEARCH_BACKEND', default))
+
+    @property
+    def SHOP_EMBEDDED_SEARCH_INDEX(self):
+        """
+        Path to the SQLite database file, used by the embedded search backend to store its index.
+        Defaults to ``search-index.sqlite3`` inside ``BASE_DIR`` or the current working directory.
+        """
+        import os
+
+        base_dir = self._setting('BASE_DIR', os.getcwd())
+        return self._setting('SHOP_EMBEDDED_SEARCH_INDEX', os.path.join(str(base_dir), 'search-index.sqlite3'))
+
+    @property
+    def SHOP_SEARCH_INDEX_QUEUE(self):
+        """
+        Products modified through the admin backend are not indexed by the search backend immediately,
+        but added to a queue, which is drained in batches. Keys of this dictionary are:
+
+        * ``autodrain``: If ``True`` (the default), the queue is drained by a background thread
+          after each committed transaction. Set to ``False`` if the queue shall be drained by
+          a periodic job running ``./manage.py shop drain-index-queue``.
+        * ``batch_size``: The number of products indexed using one bulk request, defaults to 200.
+        * ``max_attempts``: The number of attempts to index a product, before it is left in the
+          queue for inspection, defaults to 5.
+        * ``claim_timeout``: The number of seconds after which products claimed by a drainer which
+          did not finish, are indexed by another one, defaults to 600.
+        """
+        result = dict(self._setting('SHOP_SEARCH_INDEX_QUEUE', {}))
+        result.setdefault('autodrain', True)
+        result.setdefault('batch_size', 200)
+        result.setdefault('max_attempts', 5)
+        result.setdefault('claim_timeout', 600)
+        return result
+
     def __getattr__(self, key):
         if not key.startswith('SHOP_'):
             key = 'SHOP_' + key
@@ -0,0 +1,135 @@
+"""
+Events informing separately running worker engines about changes in the shop, for instance that
+emails are ready for delivery. Events emitted inside a transaction are collected and published in
+one batch after that transaction has been committed. Identical events are coalesced, so that the
+workers receive only one wake-up per batch. Events emitted outside of a transaction are published
+immediately.
+"""
+from functools import lru_cache
+import json
+import threading
+
+from django.db import connection, transaction
+
+from shop.conf import app_settings
+
+CHANNEL = 'django-SHOP'
+
+# kept as plain string, since workers engines listen for this message
+EMAIL_QUEUED = 'send_queued_mail'
+ORDER_TRANSITIONED = 'order_transitioned'
+STOCK_CHANGED = 'stock_changed'
+CART_CONVERTED = 'cart_converted'
+
+
+class EventBackend:
+    """
+    Interface for the backends delivering events to the worker engines.
+    """
+    def publish(self, channel, messages):
+        """
+        Publish the given list of messages onto ``channel``.
+        """
+        raise NotImplementedError("{} must implement method `.publish()`.".format(self.__class__))
+
+
+class NullEventBackend(EventBackend):
+    """
+    Backend discarding all events, used if no worker engine is configured.
+    """
+    def publish(self, channel, messages):
+        pass
+
+
+class InMemoryEventBackend(EventBackend):
+    """
+    Backend keeping the published batches in memory. Use it in tests to verify which events
+    have been emitted.
+    """
+    def __init__(self):
+        self.batches = []
+
+    def publish(self, channel, messages):
+        self.batches.append((channel, list(messages)))
+
+    @property
+    def messages(self):
+        return [message for _, batch in self.batches for message in batch]
+
+    def clear(self):
+        self.batches.clear()
+
+
+class RedisEventBackend(EventBackend):
+    """
+    Backend publishing events through Redis, using the connection configured by setting
+    ``SESSION_REDIS``. All messages of a batch are sent using one pipeline.
+    """
+    def __init__(self):
+        import redis
+        from django.conf import settings
+
+        params = {key: settings.SESSION_REDIS[key] for key in ['host', 'port', 'db', 'socket_timeout']}
+        self.redis = redis.Redis(connection_pool=redis.ConnectionPool(**params))
+
+    def publish(self, channel, messages):
+        pipeline = self.redis.pipeline(transaction=False)
+        for message in messages:
+            pipeline.publish(channel, message)
+        pipeline.execute()
+
+
+class EventBatch:
+    """
+    The events emitted during one transaction. The batch is published when invoked as
+    ``on_commit`` callback.
+    """
+    def __init__(self, bus):
+        self.bus = bus
+        self.messages = {}  # used as ordered set
+
+    def add(self, message):
+        self.messages[message] = None
+
+    def __call__(self):
+        self.bus.discard(self)
+        self.bus.backend.publish(CHANNEL, list(self.messages))
+
+
+class EventBus:
+    def __init__(self, backend):
+        self.backend = backend
+        self._local = threading.local()
+
+    def _get_pending_batch(self):
+        batch = getattr(self._local, 'batch', None)
+        # if the transaction has been rolled back, its on_commit callbacks have been dropped
+        if batch and any(entry[1] is batch for entry in connection.run_on_commit):
+            return batch
+
+    def discard(self, batch):
+        if getattr(self._local, 'batch', None) is batch:
+            self._local.batch = None
+
+    def emit(self, event, **payload):
+        """
+        Emit an event. Events with a payload are serialized as JSON.
+        """
+        message = json.dumps(dict(payload, event=event), sort_keys=True) if payload else event
+        if not connection.in_atomic_block:
+            self.backend.publish(CHANNEL, [message])
+            return
+        batch = self._get_pending_batch()
+        if batch is None:
+            batch = self._local.batch = EventBatch(self)
+            transaction.on_commit(batch)
+        batch.add(message)
+
+
+@lru_cache()
+def get_event_bus():
+    return EventBus(app_settings.EVENT_BACKEND())
+
+
+def emit(event, **payload):
+    get_event_bus().emit(event, **payload)
@@ -31,7 +31,7 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument(
             'subcommand',
-            help="./manage.py shop [customers|check-pages|review-settings]",
+            help="./manage.py shop [customers|check-pages|review-settings|render-sitemap|drain-index-queue|reindex]",
         )
         parser.add_argument(
             '--delete-expired',
@@ -53,6 +53,32 @@ class Command(BaseCommand):
             default=False,
             help="Use in combination with 'check-pages' to add missing recommended pages.",
         )
+        parser.add_argument(
+            '--sitemap-dir',
+            dest='sitemap_dir',
+            default='sitemaps',
+            help="Use in combination with 'render-sitemap' to set the folder inside the storage.",
+        )
+        parser.add_argument(
+            '--protocol',
+            dest='protocol',
+            default='https',
+            help="Use in combination with 'render-sitemap' to set the protocol of the rendered URLs.",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            dest='batch_size',
+            default=None,
+            help="Use in combination with 'drain-index-queue' or 'reindex' to set the number of products per bulk request.",
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            dest='processes',
+            default=None,
+            help="Use in combination with 'reindex' to set the number of worker processes.",
+        )
 
     def handle(self, verbosity, subcommand, *args, **options):
         if subcommand == 'help':
@@ -70,6 +96,22 @@ Usage:
 
 ./manage.py shop review-settings
     Review all shop related settings and complain about missing- or mis-configurations.
+
+./manage.py shop render-sitemap
+    Prerender the sitemap index and all sitemap shards for products into the default storage.
+    Use option --sitemap-dir to change the folder inside the storage, defaults to 'sitemaps'.
+    Use option --protocol to change the protocol of the rendered URLs, defaults to 'https'.
+
+./manage.py shop drain-index-queue
+    Index all products waiting in the queue of the search index.
+    Use option --batch-size to change the number of products indexed using one bulk request.
+
+./manage.py shop reindex
+    Rebuild the search indices for all products. With Elasticsearch, index into new versioned indices
+    using a pool of worker processes. Afterwards swap the index aliases, so that searching is not
+    interrupted.
+    Use option --processes to change the number of worker processes, defaults to the number of CPUs.
+    Use option --batch-size to change the number of products indexed by each worker task.
 """)
         elif subcommand == 'customers':
             self.delete_expired = options['delete_expired']
@@ -88,8 +130,15 @@ Usage:
             self.stdout.write("The following configuration settings must be fixed:")
             for k, msg in enumerate(self.review_settings(), 1):
                 self.stdout.write(" {}. {}".format(k, msg))
+        elif subcommand == 'render-sitemap':
+            for name in self.render_sitemap(options['sitemap_dir'], options['protocol']):
+                self.stdout.write("Rendered sitemap: {}".format(name))
+        elif subcommand == 'drain-index-queue':
+            self.drain_index_queue(options['batch_size'])
+        elif subcommand == 'reindex':
+            self.reindex(options['processes'], options['batch_size'])
         else:
-            msg = "Unknown sub-command for shop. Use one of: customer check-pages review-settings"
+            msg = "Unknown sub-command for shop. Use one of: customer check-pages review-settings render-sitemap drain-index-queue reindex"
             self.stderr.write(msg.format(subcommand))
 
     def customers(self):
@@ -118,6 +167,61 @@ Usage:
         msg = "Customers in this shop: total={total}, anonymous={anonymous}, expired={expired}, active={active}, guests={guests}, registered={registered}, staff={staff}."
         self.stdout.write(msg.format(**data))
 
+    def render_sitemap(self, sitemap_dir, protocol):
+        """
+        Entry point for subcommand ``./manage.py shop render-sitemap``.
+        Render each shard of the products sitemap and the sitemap index referring to them into
+        the default storage, so that they can be served as static files.
+        """
+        from django.contrib.sites.models import Site
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from django.template.loader import render_to_string
+        from shop.views.sitemap import ProductsSitemap
+
+        def save(name, content):
+            name = '{}/{}'.format(sitemap_dir, name)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, ContentFile(content.encode('utf-8')))
+            url = default_storage.url(name)
+            if not url.startswith(('http://', 'https://')):
+                url = '{}://{}{}'.format(protocol, site.domain, url)
+            return name, url
+
+        site = Site.objects.get_current()
+        sitemap = ProductsSitemap()
+        locations = []
+        for page in range(1, sitemap.paginator.num_pages + 1):
+            urlset = sitemap.get_urls(page=page, site=site, protocol=protocol)
+            name, url = save('products-{}.xml'.format(page), render_to_string('sitemap.xml', {'urlset': urlset}))
+            locations.append(url)
+            yield name
+        name, url = save('sitemap.xml', render_to_string('sitemap_index.xml', {'sitemaps': locations}))
+        yield name
+
+    def drain_index_queue(self, batch_size):
+        """
+        Entry point for subcommand ``./manage.py shop drain-index-queue``.
+        """
+        from shop.search.indexing import drain_index_queue
+
+        indexed, failed = drain_index_queue(batch_size=batch_size)
+        msg = "Products in the search index queue: indexed={}, failed={}."
+        self.stdout.write(msg.format(indexed, failed))
+
+    def reindex(self, processes, batch_size):
+        """
+        Entry point for subcommand ``./manage.py shop reindex``.
+        """
+        from shop.search.backends import get_search_backend
+
+        total = 0
+        for indexed in get_search_backend().rebuild_index(processes=processes, shard_size=batch_size or 1000):
+            total += indexed
+            self.stdout.write("Indexed {} products.".format(total))
+        self.stdout.write("Rebuilt search indices.")
+
     def create_recommended_pages(self):
         from cms.models.pagemodel import Page
         from cms.utils.i18n import get_public_languages
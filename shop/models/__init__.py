@@ -1 +1,3 @@
 from shop.models.notification import Notification, NotificationAttachment
+from shop.models.search import ProductIndexTask
+from shop.models.sequence import NumberSequence
@@ -1,12 +1,13 @@
 import warnings
 from collections import OrderedDict
+from copy import deepcopy
 
 from django.core import checks
-from django.db import models
+from django.db import connections, models
 from django.utils.translation import gettext_lazy as _
 
 from shop import deferred
-from shop.models.fields import JSONField
+from shop.models.fields import JSONField, JSONSet
 from shop.models.customer import CustomerModel
 from shop.models.product import BaseProduct
 from shop.modifiers.pool import cart_modifiers_pool
@@ -238,6 +239,8 @@ class BaseCart(models.Model, metaclass=deferred.ForeignKeyBuilder):
         else:
             items = CartItemModel.objects.filter_cart_items(self, request)
 
+        previous_extra = deepcopy(self.extra)
+
         # This calls all the pre_process_cart methods and the pre_process_cart_item for each item,
         # before processing the cart. This allows to prepare and collect data on the cart.
         for modifier in cart_modifiers_pool.get_all_modifiers():
@@ -268,10 +271,28 @@ class BaseCart(models.Model, metaclass=deferred.ForeignKeyBuilder):
         for modifier in reversed(cart_modifiers_pool.get_all_modifiers()):
             modifier.post_process_cart(self, request)
 
+        # write the keys of extra changed by the modifiers, without rewriting the other ones
+        changed_extra = {k: v for k, v in self.extra.items() if k not in previous_extra or previous_extra[k] != v}
+        if changed_extra:
+            self.update_extra(**changed_extra)
+
         # Cache updated cart items
         self._cached_cart_items = items
         self._dirty = False
 
+    def update_extra(self, **values):
+        """
+        Set the given keys in ``extra``. Only these keys are written to the database, rather than
+        the whole dictionary, hence use this method instead of saving the cart after changing them.
+        """
+        self.extra.update(values)
+        if self.pk:
+            queryset = CartModel.objects.filter(pk=self.pk)
+            if JSONSet.is_supported(connections[queryset.db]):
+                queryset.update(extra=JSONSet('extra', **values))
+            else:
+                queryset.update(extra=self.extra)
+
     def empty(self):
         """
         Remove the cart with all its items.
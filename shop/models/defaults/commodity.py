@@ -100,7 +100,10 @@ if settings.USE_I18N:
         caption = TranslatedField()
 
         # filter expression used to search for a product item using the Select2 widget
-        lookup_fields = ['product_code__startswith', 'product_name__icontains']
+        lookup_fields = ['product_code__startswith', 'translations__product_name__istartswith']
+
+        # relations fetched in bulk, while rendering the catalog's list view
+        catalog_related_fields = ['sample_image']
 
         objects = ProductManager()
 
@@ -212,7 +215,10 @@ else:
         )
 
         # filter expression used to search for a product item using the Select2 widget
-        lookup_fields = ['product_code__startswith', 'product_name__icontains']
+        lookup_fields = ['product_code__startswith', 'product_name__istartswith']
+
+        # relations fetched in bulk, while rendering the catalog's list view
+        catalog_related_fields = ['sample_image']
 
         objects = BaseProductManager()
 
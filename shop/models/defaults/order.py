@@ -6,6 +6,7 @@ from django.db import models
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _, pgettext_lazy
 from shop.models import order
+from shop.models.sequence import NumberSequence
 
 
 class Order(order.BaseOrder):
@@ -46,18 +47,26 @@ class Order(order.BaseOrder):
     def get_or_assign_number(self):
         """
         Set a unique number to identify this Order object. The first 4 digits represent the
-        current year. The last five digits represent a zero-padded incremental counter.
+        current year. The last five digits represent a zero-padded incremental counter, allocated
+        from a sequence per year. Invoke this method inside the transaction saving the order.
         """
         if self.number is None:
             epoch = timezone.now()
             epoch = epoch.replace(epoch.year, 1, 1, 0, 0, 0, 0)
-            aggr = Order.objects.filter(number__isnull=False, created_at__gt=epoch).aggregate(models.Max('number'))
-            try:
-                epoc_number = int(str(aggr['number__max'])[4:]) + 1
-                self.number = int('{0}{1:05d}'.format(epoch.year, epoc_number))
-            except (KeyError, ValueError):
-                # the first order this year
-                self.number = int('{0}00001'.format(epoch.year))
+
+            def get_last_epoch_number():
+                # continue counting orders numbered before this sequence existed
+                aggr = Order.objects.filter(number__isnull=False, created_at__gt=epoch).aggregate(models.Max('number'))
+                try:
+                    return int(str(aggr['number__max'])[4:])
+                except ValueError:
+                    return 0  # the first order this year
+
+            epoch_number = NumberSequence.objects.next_value(
+                'order-number-{}'.format(epoch.year),
+                initial=get_last_epoch_number,
+            )
+            self.number = int('{0}{1:05d}'.format(epoch.year, epoch_number))
         return self.get_number()
 
     def get_number(self):
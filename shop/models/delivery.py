@@ -1,9 +1,10 @@
 from django.core import checks
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Max
 from django.utils.translation import gettext_lazy as _
 
 from shop import deferred
-from shop.models.order import BaseOrder, BaseOrderItem, OrderItemModel
+from shop.models.order import BaseOrder, BaseOrderItem, OrderModel, OrderItemModel
 from shop.modifiers.pool import cart_modifiers_pool
 
 
@@ -44,9 +45,16 @@ class BaseDelivery(models.Model, metaclass=deferred.ForeignKeyBuilder):
         help_text=_("The shipping backend used to deliver items of this order"),
     )
 
+    number = models.PositiveIntegerField(
+        _("Delivery number"),
+        null=True,
+        editable=False,
+        help_text=_("Sequence number of this delivery within its order"),
+    )
+
     class Meta:
         abstract = True
-        unique_together = ['shipping_method', 'shipping_id']
+        unique_together = [['shipping_method', 'shipping_id'], ['order', 'number']]
         get_latest_by = 'shipped_at'
 
     def __str__(self):
@@ -63,6 +71,32 @@ class BaseDelivery(models.Model, metaclass=deferred.ForeignKeyBuilder):
              errors.append(checks.Error(msg.format(OrderItemModel.__name__)))
         return errors
 
+    @classmethod
+    def allocate_numbers(cls, order_ids):
+        """
+        Return a dict mapping each of the given order IDs onto the next free delivery number of
+        that order. The orders are locked until the current transaction ends, hence the Delivery
+        objects using these numbers must be created inside that transaction.
+        """
+        list(OrderModel.objects.select_for_update().filter(pk__in=order_ids).values_list('pk', flat=True))
+        numbers = {order_id: 1 for order_id in order_ids}
+        aggregates = cls.objects.filter(order__in=order_ids).order_by().values('order').annotate(
+            max_number=Max('number'),
+            count=Count('pk'),
+        )
+        for aggr in aggregates:
+            # deliveries created before numbering was introduced, have no number
+            numbers[aggr['order']] = max(aggr['max_number'] or 0, aggr['count']) + 1
+        return numbers
+
+    def save(self, *args, **kwargs):
+        if self.number is not None or self.pk:
+            super().save(*args, **kwargs)
+            return
+        with transaction.atomic():
+            self.number = self.allocate_numbers([self.order_id])[self.order_id]
+            super().save(*args, **kwargs)
+
     def clean(self):
         if self.order._fsm_requested_transition == ('status', 'shipping_prepared') and not self.shipped_at:
             shipping_modifier = cart_modifiers_pool.get_active_shipping_modifier(self.shipping_method)
@@ -74,6 +108,8 @@ class BaseDelivery(models.Model, metaclass=deferred.ForeignKeyBuilder):
         A class inheriting from Order may transform this into a string which is better readable.
         """
         if self.order.allow_partial_delivery:
+            if self.number is not None:
+                return "{} / {}".format(self.order.get_number(), self.number)
             for part, delivery in enumerate(self.order.delivery_set.all(), 1):
                 if delivery.pk == self.pk:
                     return "{} / {}".format(self.order.get_number(), part)
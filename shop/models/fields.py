@@ -1,25 +1,73 @@
 import enum
-# from django.conf import settings
-from jsonfield.fields import JSONField as _JSONField
-from django.db import models
+import json
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import NotSupportedError, models
 from django.utils.encoding import force_str
 from django.utils.translation import gettext_lazy as _
 
 
-postgresql_engine_names = [
-    'django.db.backends.postgresql',
-    'django.db.backends.postgresql_psycopg2',
-]
+class JSONText(str):
+    """
+    The encoded content of a :class:`JSONField` as loaded from the database, and not decoded yet.
+    """
+
+
+class JSONDescriptor:
+    """
+    Decodes the content of a :class:`JSONField` on first access, rather than when loading the
+    model instance. Content which is never accessed, is written back unchanged.
+    """
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        attname = self.field.attname
+        if attname not in instance.__dict__:
+            instance.refresh_from_db(fields=[attname])  # field has been deferred
+        value = instance.__dict__[attname]
+        if isinstance(value, JSONText):
+            value = instance.__dict__[attname] = json.loads(value)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class JSONFormField(forms.CharField):
+    widget = forms.Textarea
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        try:
+            return json.loads(value) if value else {}
+        except ValueError:
+            raise ValidationError(_("Enter valid JSON."), code='invalid')
+
+    def prepare_value(self, value):
+        if isinstance(value, str):
+            return value
+        return json.dumps(value, cls=DjangoJSONEncoder, indent=2)
+
 
-''' Jacob - Version warum - Perfomance?
-if settings.DATABASES['default']['ENGINE'] in postgresql_engine_names:
-    from django.contrib.postgres.fields import JSONField as _JSONField
-else:
-    from jsonfield.fields import JSONField as _JSONField
-'''
+class JSONField(models.Field):
+    """
+    Field storing a dictionary as JSON. On PostgreSQL and MySQL the database's native JSON type
+    is used, elsewhere the content is stored as text. Columns created as text by previous versions
+    keep working, but may be converted, for instance on PostgreSQL using
+    ``ALTER TABLE … ALTER COLUMN extra TYPE jsonb USING extra::jsonb``.
 
+    The content is decoded lazily, when the attribute is accessed. Querysets using ``values()`` or
+    ``values_list()`` hence return the encoded text. To change only some keys of the stored
+    dictionary, use the expression :class:`JSONSet` inside a queryset ``update()``.
+    """
+    description = _("A dictionary stored as JSON")
+    empty_strings_allowed = False
 
-class JSONField(_JSONField):
     def __init__(self, *args, **kwargs):
         kwargs.update({'default': dict})
         super().__init__(*args, **kwargs)
@@ -29,6 +77,102 @@ class JSONField(_JSONField):
         del kwargs['default']
         return name, path, args, kwargs
 
+    def db_type(self, connection):
+        if connection.vendor == 'postgresql':
+            return 'jsonb'
+        if connection.vendor == 'mysql':
+            return 'json'
+        return 'text'
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, JSONDescriptor(self))
+
+    def select_format(self, compiler, sql, params):
+        if compiler.connection.vendor == 'postgresql':
+            # prevent psycopg2 from decoding the content while loading the row
+            return '{}::text'.format(sql), params
+        return super().select_format(compiler, sql, params)
+
+    def from_db_value(self, value, expression, connection):
+        if isinstance(value, str):
+            return JSONText(value)
+        return value
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        # bypass the descriptor to keep content, which has not been decoded, as it is
+        return model_instance.__dict__[self.attname]
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, JSONText):
+            return value
+        return json.dumps(value, cls=DjangoJSONEncoder)
+
+    def value_to_string(self, obj):
+        return self.get_prep_value(self.value_from_object(obj))
+
+    def formfield(self, **kwargs):
+        return super().formfield(**dict({'form_class': JSONFormField}, **kwargs))
+
+
+class JSONSet(models.Expression):
+    """
+    Expression setting some keys of the dictionary stored in a :class:`JSONField`, without
+    rewriting its other keys. Usage::
+
+        CartModel.objects.filter(pk=cart.pk).update(extra=JSONSet('extra', shipping_modifier='postal'))
+    """
+    def __init__(self, expression, **values):
+        super().__init__(output_field=JSONField())
+        self.expression = models.F(expression) if isinstance(expression, str) else expression
+        self.values = values
+
+    @classmethod
+    def is_supported(cls, connection):
+        """
+        Return ``True``, if the given database connection is able to set single keys. Otherwise
+        the caller shall write the whole dictionary.
+        """
+        return hasattr(cls, 'as_{}'.format(connection.vendor))
+
+    def get_source_expressions(self):
+        return [self.expression]
+
+    def set_source_expressions(self, exprs):
+        self.expression, = exprs
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError("JSONSet is not supported on {}.".format(connection.vendor))
+
+    def as_postgresql(self, compiler, connection):
+        sql, params = compiler.compile(self.expression)
+        if not self.values:
+            return sql, params
+        sql = "(COALESCE(NULLIF({}::text, ''), '{{}}')::jsonb || %s::jsonb)".format(sql)
+        return sql, list(params) + [json.dumps(self.values, cls=DjangoJSONEncoder)]
+
+    def _json_set(self, compiler, function, template):
+        sql, params = compiler.compile(self.expression)
+        if not self.values:
+            return sql, params
+        params = list(params)
+        for key, value in self.values.items():
+            params.extend(['$."{}"'.format(key), json.dumps(value, cls=DjangoJSONEncoder)])
+        sql = "{}(COALESCE(NULLIF({}, ''), '{{}}'), {})".format(
+            function, sql, ', '.join(template for _ in self.values))
+        return sql, params
+
+    def as_sqlite(self, compiler, connection):
+        return self._json_set(compiler, 'json_set', '%s, json(%s)')
+
+    def as_mysql(self, compiler, connection):
+        return self._json_set(compiler, 'JSON_SET', "%s, JSON_EXTRACT(%s, '$')")
+
 
 class ChoiceEnumMeta(enum.EnumMeta):
     def __call__(cls, value, *args, **kwargs):
@@ -3,6 +3,7 @@ from django.db import models
 from django.db.models.aggregates import Sum
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from shop import events
 from shop.conf import app_settings
 from shop.models.product import Availability, BaseReserveProductMixin
 from shop.exceptions import ProductNotAvailable
@@ -63,6 +64,7 @@ class AvailableProductMixin:
                 break
         else:
             raise ProductNotAvailable(self)
+        events.emit(events.STOCK_CHANGED, product=self.pk)
 
     def managed_availability(self):
         return True
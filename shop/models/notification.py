@@ -1,5 +1,10 @@
+import threading
+import uuid
+
 from django.conf import settings
-from django.db import models
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import models, transaction
 from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from post_office.models import EmailTemplate
@@ -84,3 +89,100 @@ class NotificationAttachment(models.Model):
 
     class Meta:
         app_label = 'shop'
+
+
+class NotificationRule:
+    """
+    A notification, together with its mail templates resolved per language and the metadata of
+    its attachments. Instances are shared between threads and hence must not be modified.
+    """
+    def __init__(self, notification):
+        self.notification = notification
+        self.mail_template = notification.mail_template
+        self.translated_templates = {
+            template.language: template for template in notification.mail_template.translated_templates.all()
+        }
+        self.attachments = [
+            (notiatt.attachment.original_filename, notiatt.attachment.file.storage,
+             notiatt.attachment.file.name, notiatt.attachment.mime_type)
+            for notiatt in notification.notificationattachment_set.all() if notiatt.attachment
+        ]
+
+    def get_recipient(self, order):
+        if self.notification.notify is Notify.RECIPIENT:
+            # the recipient's email address may change, without invalidating the rules
+            recipients = get_user_model().objects.filter(pk=self.notification.recipient_id)
+            return recipients.values_list('email', flat=True).first()
+        return self.notification.get_recipient(order)
+
+    def get_mail_template(self, language):
+        return self.translated_templates.get(language, self.mail_template)
+
+    def open_attachments(self):
+        """
+        Return the attachments in a form accepted by the Post-Office. The files are opened, but
+        not read, so that the Post-Office copies them by chunks. The caller must close them.
+        """
+        return {
+            filename: {'file': storage.open(name), 'mimetype': mimetype}
+            for filename, storage, name, mimetype in self.attachments
+        }
+
+
+class NotificationRuleIndex:
+    """
+    In-process index of the notification rules, keyed by the transition target they apply to.
+
+    The index is cleared whenever a notification, one of its attachments or a mail template
+    changes. Since other processes may perform these changes, a version stamp is kept in the
+    cache and compared on each lookup.
+    """
+    version_key = 'notification_rules:version'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules = {}
+        self._version = None
+
+    def get_rules(self, transition_target):
+        version = cache.get(self.version_key)
+        with self._lock:
+            if version != self._version:
+                self._rules.clear()
+                self._version = version
+            rules = self._rules.get(transition_target)
+        if rules is None:
+            queryset = Notification.objects.filter(transition_target=transition_target).select_related(
+                'mail_template',
+            ).prefetch_related(
+                'mail_template__translated_templates',
+                'notificationattachment_set__attachment',
+            )
+            rules = [NotificationRule(notification) for notification in queryset]
+            with self._lock:
+                # do not store rules, if the index has been invalidated while loading them
+                if version == self._version:
+                    self._rules[transition_target] = rules
+        return rules
+
+    def invalidate(self):
+        version = uuid.uuid4().hex
+        with self._lock:
+            self._rules.clear()
+            self._version = version
+        cache.set(self.version_key, version, None)
+
+
+notification_rules = NotificationRuleIndex()
+
+
+def invalidate_notification_rules(sender, **kwargs):
+    """
+    Signal handler clearing the notification rule index, whenever a ``Notification``, a
+    ``NotificationAttachment`` or an ``EmailTemplate`` is saved or deleted.
+
+    The version stamp is bumped again after the transaction has been committed, since other
+    processes may have loaded the previous rules meanwhile.
+    """
+    notification_rules.invalidate()
+    transaction.on_commit(notification_rules.invalidate)
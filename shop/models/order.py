@@ -1,25 +1,56 @@
 from decimal import Decimal
 import logging
+import weakref
 from urllib.parse import urljoin
 
-from cms.utils.i18n import get_current_language
 from django.core import checks
 from django.core.exceptions import ImproperlyConfigured
 from django.db import models, transaction
+from django.db.models import ExpressionWrapper, OuterRef, Subquery, Value
 from django.db.models.aggregates import Sum
-from django.urls import NoReverseMatch, reverse
-from django.utils.functional import cached_property
+from django.db.models.functions import Coalesce
 from django.utils.translation import gettext_lazy as _, pgettext_lazy, get_language_from_request
 
 from django_fsm import FSMField, transition
 from ipware.ip import get_client_ip
-from cms.models import Page
 from shop.conf import app_settings
 from shop.models.cart import CartItemModel
 from shop.models.fields import JSONField
+from shop.money import AbstractMoney
 from shop.money.fields import MoneyField, MoneyMaker
-from shop import deferred
+from shop import deferred, events
 from shop.models.product import BaseProduct
+from shop.pages import get_page_url
+
+
+def compact_extra_rows(extra_rows):
+    """
+    Convert the extra rows added to a cart or cart item by its modifiers into the compact
+    representation stored in the ``extra`` field of orders and order items: a dictionary holding
+    the lists of modifier identifiers, labels and amounts, the latter in minor units.
+    """
+    rows = {'modifiers': [], 'labels': [], 'amounts': []}
+    for modifier, extra_row in extra_rows.items():
+        label, amount = extra_row.label, extra_row.amount
+        rows['modifiers'].append(modifier)
+        rows['labels'].append(None if label is None else str(label))
+        rows['amounts'].append(amount.as_integer() if isinstance(amount, AbstractMoney) else amount)
+    return rows
+
+
+def expand_extra_rows(rows, currency):
+    """
+    Reconstruct the extra rows stored by :func:`compact_extra_rows` as a list of pairs, each
+    containing the modifier's identifier and a dictionary with the row's label and amount.
+    Rows stored in the previous, uncompressed format, are returned unaltered.
+    """
+    if not isinstance(rows, dict):
+        return rows
+    Money = MoneyMaker(currency)
+    return [
+        (modifier, {'label': label, 'amount': None if amount is None else Money(Decimal(amount) / Money.subunits)})
+        for modifier, label, amount in zip(rows['modifiers'], rows['labels'], rows['amounts'])
+    ]
 
 
 class OrderQuerySet(models.QuerySet):
@@ -42,10 +73,61 @@ class OrderQuerySet(models.QuerySet):
                 lookup_kwargs.update({key: lookup})
         return super()._filter_or_exclude(negate, *args, **lookup_kwargs)
 
+    def with_unfulfilled_items(self):
+        """
+        Annotate each order with attribute ``unfulfilled_items``, the quantity of ordered items
+        which neither have been canceled nor delivered yet. This requires a materialized
+        ``DeliveryItemModel`` and is intended for orders using the
+        :class:`shop.shipping.workflows.PartialDeliveryWorkflowMixin`.
+        """
+        from shop.models.delivery import DeliveryItemModel
+
+        quantity_field = OrderItemModel._meta.get_field('quantity')
+
+        def total_quantity(queryset, group_by):
+            subquery = queryset.order_by().values(group_by).annotate(total=Sum('quantity')).values('total')
+            return Coalesce(Subquery(subquery, output_field=quantity_field), Value(0), output_field=quantity_field)
+
+        ordered = OrderItemModel.objects.filter(order=OuterRef('pk'), canceled=False)
+        delivered = DeliveryItemModel.objects.filter(item__order=OuterRef('pk'), item__canceled=False)
+        return self.annotate(unfulfilled_items=ExpressionWrapper(
+            total_quantity(ordered, 'order') - total_quantity(delivered, 'item__order'),
+            output_field=quantity_field,
+        ))
+
+    def _payments_total(self):
+        payments = OrderPayment.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        subquery = payments.annotate(total=Sum('amount')).values('total')
+        output_field = models.DecimalField(**BaseOrder.decimalfield_kwargs)
+        return Coalesce(Subquery(subquery, output_field=output_field), Value(0), output_field=output_field)
+
+    def with_amount_paid(self):
+        """
+        Annotate each order with attribute ``paid_total``, the sum of its payments computed from
+        the ``OrderPayment`` objects, rather than from the amount stored on the order. If present,
+        it is used by ``Order.amount_paid``.
+        """
+        return self.annotate(paid_total=self._payments_total())
+
+    def update_amount_paid(self):
+        """
+        Recompute the amount paid stored on each order from its ``OrderPayment`` objects.
+        """
+        return self.update(_amount_paid=self._payments_total())
+
 
 class OrderManager(models.Manager):
     _queryset_class = OrderQuerySet
 
+    def with_unfulfilled_items(self):
+        return self.get_queryset().with_unfulfilled_items()
+
+    def with_amount_paid(self):
+        return self.get_queryset().with_amount_paid()
+
+    def update_amount_paid(self):
+        return self.get_queryset().update_amount_paid()
+
     def create_from_cart(self, cart, request):
         """
         This creates a new empty Order object with a valid order number (many payment service
@@ -64,9 +146,11 @@ class OrderManager(models.Manager):
             _total=Decimal(0),
             stored_request=self.stored_request(request),
         )
-        order.get_or_assign_number()
-        order.assign_secret()
-        order.save()
+        with transaction.atomic():
+            # numbers are allocated from a sequence, locked until the order has been saved
+            order.get_or_assign_number()
+            order.assign_secret()
+            order.save()
         return order
 
     def stored_request(self, request):
@@ -81,23 +165,12 @@ class OrderManager(models.Manager):
             'user_agent': request.META.get('HTTP_USER_AGENT'),
         }
 
-    def get_summary_url(self):
+    def get_summary_url(self, language=None):
         """
-        Returns the URL of the page with the list view for all orders related to the current customer
+        Returns the URL of the page with the list view for all orders related to the current customer,
+        or an empty string, if there is no such page.
         """
-        if not hasattr(self, '_summary_url'):
-            try:  # via CMS pages
-                page = Page.objects.public().get(reverse_id='shop-order')
-            except Page.DoesNotExist:
-                page = Page.objects.public().filter(application_urls='OrderApp').first()
-            if page:
-                self._summary_url = page.get_absolute_url(language=get_current_language())
-            else:
-                try:  # through hardcoded urlpatterns
-                    self._summary_url = reverse('shop-order')
-                except NoReverseMatch:
-                    self._summary_url = '/cms-page_or_view_with__reverse_id=shop-order__does_not_exist/'
-        return self._summary_url
+        return get_page_url('shop-order', language)
 
 
 class WorkflowMixinMetaclass(deferred.ForeignKeyBuilder):
@@ -183,6 +256,13 @@ class BaseOrder(models.Model, metaclass=WorkflowMixinMetaclass):  # noqa: E999
         **decimalfield_kwargs
     )
 
+    _amount_paid = models.DecimalField(
+        _("Amount paid"),
+        default=Decimal(0),
+        editable=False,
+        **decimalfield_kwargs
+    )
+
     created_at = models.DateTimeField(
         _("Created at"),
         auto_now_add=True,
@@ -265,6 +345,13 @@ class BaseOrder(models.Model, metaclass=WorkflowMixinMetaclass):  # noqa: E999
         """
         return MoneyMaker(self.currency)(self._total)
 
+    @property
+    def extra_rows(self):
+        """
+        The extra rows added by the cart modifiers, as pairs of modifier identifier and row.
+        """
+        return expand_extra_rows(self.extra.get('rows', []), self.currency)
+
     @classmethod
     def round_amount(cls, amount):
         if amount.is_finite():
@@ -274,7 +361,8 @@ class BaseOrder(models.Model, metaclass=WorkflowMixinMetaclass):  # noqa: E999
         """
         Returns the URL for the detail view of this order.
         """
-        return urljoin(OrderModel.objects.get_summary_url(), self.get_number())
+        summary_url = getattr(self, '_summary_url', None) or OrderModel.objects.get_summary_url()
+        return urljoin(summary_url, self.get_number())
 
     @transaction.atomic
     @transition(field=status, source='new', target='created')
@@ -301,8 +389,9 @@ class BaseOrder(models.Model, metaclass=WorkflowMixinMetaclass):  # noqa: E999
         self._subtotal = Decimal(cart.subtotal)
         self._total = Decimal(cart.total)
         self.extra = dict(cart.extra)
-        self.extra.update(rows=[(modifier, extra_row.data) for modifier, extra_row in cart.extra_rows.items()])
+        self.extra.update(rows=compact_extra_rows(cart.extra_rows))
         self.save()
+        events.emit(events.CART_CONVERTED, cart=cart.pk, order=self.pk)
 
     @transaction.atomic
     def readd_to_cart(self, cart):
@@ -340,15 +429,13 @@ class BaseOrder(models.Model, metaclass=WorkflowMixinMetaclass):  # noqa: E999
         if with_notification:
             transition_change_notification(self)
 
-    @cached_property
+    @property
     def amount_paid(self):
         """
-        The amount paid is the sum of related orderpayments
+        The amount paid is the sum of related orderpayments. It is stored on the order and kept
+        up to date, whenever an ``OrderPayment`` is saved or deleted.
         """
-        amount = self.orderpayment_set.aggregate(amount=Sum('amount'))['amount']
-        if amount is None:
-            amount = MoneyMaker(self.currency)()
-        return amount
+        return MoneyMaker(self.currency)(getattr(self, 'paid_total', self._amount_paid))
 
     @property
     def outstanding_amount(self):
@@ -452,6 +539,53 @@ class OrderPayment(models.Model, metaclass=deferred.ForeignKeyBuilder):
         return _("Payment ID: {}").format(self.id)
 
 
+def update_amount_paid(sender, instance, **kwargs):
+    """
+    Signal handler updating the amount paid stored on the order, whenever an ``OrderPayment`` is
+    saved or deleted.
+    """
+    orders = OrderModel.objects.filter(pk=instance.order_id)
+    if not orders.update_amount_paid():
+        return
+    # the order may perform a transition depending on the amount paid, hence update all its
+    # instances loaded in this process, rather than letting the transition conditions query it
+    amount_paid = orders.values_list('_amount_paid', flat=True).get()
+    for (pk, _id), order in list(loaded_orders.items()):
+        if pk == instance.order_id:
+            order._amount_paid = amount_paid
+            order.__dict__.pop('paid_total', None)
+
+
+# the instances of orders loaded in this process, keyed by their primary key and identity
+loaded_orders = weakref.WeakValueDictionary()
+
+
+def track_loaded_order(sender, instance, **kwargs):
+    """
+    Signal handler remembering each instance of an order, whenever it is loaded or saved.
+    """
+    if instance.pk is not None:
+        loaded_orders[instance.pk, id(instance)] = instance
+
+
+def backfill_amount_paid(sender, plan=None, using=None, **kwargs):
+    """
+    Signal handler computing the amount paid stored on each order from its payments, after the
+    migration adding that field to the materialized Order model has been applied.
+    """
+    from django.db.migrations.operations import AddField
+
+    opts = OrderModel._meta
+    for migration, backwards in plan or []:
+        if backwards or migration.app_label != opts.app_label:
+            continue
+        for operation in migration.operations:
+            if isinstance(operation, AddField) and operation.model_name_lower == opts.model_name \
+                    and operation.name == '_amount_paid':
+                OrderModel.objects.using(using).update_amount_paid()
+                return
+
+
 class BaseOrderItem(models.Model, metaclass=deferred.ForeignKeyBuilder):
     """
     An item for an order.
@@ -542,6 +676,10 @@ class BaseOrderItem(models.Model, metaclass=deferred.ForeignKeyBuilder):
     def line_total(self):
         return MoneyMaker(self.order.currency)(self._line_total)
 
+    @property
+    def extra_rows(self):
+        return expand_extra_rows(self.extra.get('rows', []), self.order.currency)
+
     def populate_from_cart_item(self, cart_item, request):
         """
         From a given cart item, populate the current order item.
@@ -561,8 +699,7 @@ class BaseOrderItem(models.Model, metaclass=deferred.ForeignKeyBuilder):
         self._line_total = Decimal(cart_item.line_total)
         self.quantity = cart_item.quantity
         self.extra = dict(cart_item.extra)
-        extra_rows = [(modifier, extra_row.data) for modifier, extra_row in cart_item.extra_rows.items()]
-        self.extra.update(rows=extra_rows)
+        self.extra.update(rows=compact_extra_rows(cart_item.extra_rows))
 
     def save(self, *args, **kwargs):
         """
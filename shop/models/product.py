@@ -4,23 +4,20 @@ from urllib.parse import urljoin
 
 from django.apps import apps
 from django.conf import settings
-from django.core import cache, checks
+from django.core import checks
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist
 from django.db import models
 from django.db.models.aggregates import Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.encoding import force_str
-from django.utils.translation import gettext_lazy as _
-
-try:
-    from django_elasticsearch_dsl.registries import registry as elasticsearch_registry
-except ImportError:
-    elasticsearch_registry = type('DocumentRegistry', (), {'get_documents': lambda *args: []})()
+from django.utils.translation import get_language, gettext_lazy as _
 
 from polymorphic.managers import PolymorphicManager
 from polymorphic.models import PolymorphicModel
 
-from shop import deferred
+from shop import deferred, events
 from shop.conf import app_settings
 from shop.exceptions import ProductNotAvailable
 
@@ -85,6 +82,7 @@ class AvailableProductMixin:
             raise ProductNotAvailable(self)
         self.quantity -= quantity
         self.save(update_fields=['quantity'])
+        events.emit(events.STOCK_CHANGED, product=self.pk)
 
     def managed_availability(self):
         return True
@@ -148,14 +146,15 @@ class BaseProductManager(PolymorphicManager):
     """
     A base ModelManager for all non-object manipulation needs, mostly statistics and querying.
     """
-    def select_lookup(self, search_term):
+    def select_lookup(self, search_term, **filters):
         """
         Returning a queryset containing the products matching the declared lookup fields together
         with the given search term. Each product can define its own lookup fields using the
-        member list or tuple `lookup_fields`.
+        member list or tuple `lookup_fields`. Additional ``filters`` are applied in the same
+        ``filter()`` call, so that they share the joins of multi-valued relations.
         """
         filter_by_term = (models.Q((sf, search_term)) for sf in self.model.lookup_fields)
-        queryset = self.get_queryset().filter(reduce(operator.or_, filter_by_term))
+        queryset = self.get_queryset().filter(reduce(operator.or_, filter_by_term), **filters)
         return queryset
 
     def indexable(self):
@@ -165,6 +164,27 @@ class BaseProductManager(PolymorphicManager):
         queryset = self.get_queryset().filter(active=True)
         return queryset
 
+    def catalog(self):
+        """
+        Return a queryset of active Products prepared to be rendered by the catalog's list views.
+
+        All relations accessed by the product summary serializer, ie. the polymorphic content type,
+        the translations, the CMS pages required to build the canonical URL and the related fields
+        declared in the member list or tuple `catalog_related_fields`, are fetched in bulk. This
+        keeps the number of database queries constant, regardless of the number of products.
+        """
+        from cms.models.pagemodel import Page
+
+        select_related = ['polymorphic_ctype']
+        select_related.extend(getattr(self.model, 'catalog_related_fields', []))
+        queryset = self.get_queryset().filter(active=True).select_related(*select_related)
+        if hasattr(self.model, 'translations'):
+            queryset = queryset.prefetch_related('translations')
+        if hasattr(self.model, 'cms_pages'):
+            pages = Page.objects.select_related('node').prefetch_related('title_set')
+            queryset = queryset.prefetch_related(models.Prefetch('cms_pages', queryset=pages))
+        return queryset
+
 
 class PolymorphicProductMetaclass(deferred.PolymorphicForeignKeyBuilder):
 
@@ -256,6 +276,22 @@ class BaseProduct(PolymorphicModel, metaclass=PolymorphicProductMetaclass):
         msg = "Method get_price() must be implemented by subclass: `{}`"
         raise NotImplementedError(msg.format(self.__class__.__name__))
 
+    @classmethod
+    def get_field_path(cls, field_name):
+        """
+        Return the lookup path of a field, which may either be a regular model field or a field
+        translated by django-parler. Return ``None`` if the product model has no such field.
+        """
+        try:
+            cls._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            try:
+                cls._parler_meta.root_model._meta.get_field(field_name)
+            except (AttributeError, FieldDoesNotExist):
+                return None
+            return 'translations__{}'.format(field_name)
+        return field_name
+
     def get_product_variant(self, **kwargs):
         """
         Hook for returning the variant of a product using parameters passed in by **kwargs.
@@ -272,6 +308,38 @@ class BaseProduct(PolymorphicModel, metaclass=PolymorphicProductMetaclass):
         """
         return self._meta.model.objects.filter(pk=self.pk)
 
+    @classmethod
+    def get_product_variants_in_bulk(cls, products):
+        """
+        Hook for returning the variants of many products of this type at once, for instance while
+        rebuilding the search index. Return a dict mapping the primary key of each product onto
+        a list of its variants.
+
+        Unless overridden, the variants are fetched using one query, filtered by the foreign key
+        referring from the variant model onto this product model, and grouped by product. Product
+        models whose ``get_product_variants()`` narrows down this relation, or returns anything
+        else than a queryset, shall override this method; without such a foreign key, it falls
+        back to one lookup per product.
+        """
+        if cls.get_product_variants is BaseProduct.get_product_variants:
+            return {product.pk: [product] for product in products}
+        variants = {product.pk: [] for product in products}
+        if not products:
+            return variants
+        queryset = products[0].get_product_variants()
+        foreign_key = None
+        if isinstance(queryset, models.QuerySet):
+            foreign_key = next((
+                field for field in queryset.model._meta.get_fields()
+                if field.many_to_one and field.concrete and issubclass(cls, field.related_model)
+            ), None)
+        if foreign_key is None:
+            return {product.pk: list(product.get_product_variants()) for product in products}
+        lookup = '{}__in'.format(foreign_key.name)
+        for variant in queryset.model._default_manager.filter(**{lookup: list(variants.keys())}):
+            variants[getattr(variant, foreign_key.attname)].append(variant)
+        return variants
+
     def get_availability(self, request, **kwargs):
         """
         Hook for checking the availability of a product.
@@ -348,20 +416,13 @@ class BaseProduct(PolymorphicModel, metaclass=PolymorphicProductMetaclass):
 
     def update_search_index(self):
         """
-        Update the Document inside the Elasticsearch index after changing relevant parts
-        of the product.
+        Enqueue this product to update its Document inside the search index after changing
+        relevant parts of it. The queue is drained in batches, see
+        :func:`shop.search.indexing.drain_index_queue`.
         """
-        documents = elasticsearch_registry.get_documents([ProductModel])
-        if settings.USE_I18N:
-            for language, _ in settings.LANGUAGES:
-                try:
-                    document = next(doc for doc in documents if doc._language == language)
-                except StopIteration:
-                    document = next(doc for doc in documents if doc._language is None)
-                document().update(self)
-        else:
-            document = next(doc for doc in documents)
-            document().update(self)
+        from shop.search.indexing import enqueue_products
+
+        enqueue_products([self.pk])
 
     def invalidate_cache(self):
         """
@@ -380,16 +441,159 @@ class CMSPageReferenceMixin:
     Products which refer to CMS pages in order to emulate categories, normally need a method for
     being accessed directly through a canonical URL. Add this mixin class for adding a
     ``get_absolute_url()`` method to any to product model.
+
+    Since resolving the canonical URL requires a few database queries, the resolved URLs are
+    cached per product and language. They are invalidated whenever the product is saved, its
+    categories are changed or one of the CMS pages it refers to is published.
     """
     category_fields = ['cms_pages']  # used by ProductIndex to fill the categories
 
+    # saving only other fields, such as the quantity in stock, keeps URLs and catalog menus cached
+    url_fields = ['slug', 'product_name', 'active']
+
+    @classmethod
+    def get_url_cache_key(cls, product_id, language):
+        return 'product:{0}|url-{1}'.format(product_id, language)
+
+    @classmethod
+    def get_slugs(cls, product_ids, language):
+        """
+        Fetch the slugs of the given products in bulk. Translated slugs fall back onto any other
+        language, if there is no translation for the given one.
+
+        :returns: A dict mapping the primary key of each product onto its slug.
+        """
+        field_path = cls.get_field_path('slug')
+        queryset = cls.objects.filter(pk__in=product_ids)
+        if field_path == 'slug':
+            return dict(queryset.values_list('pk', 'slug'))
+        slugs = {}
+        for pk, language_code, slug in queryset.values_list('pk', 'translations__language_code', field_path):
+            if slug and (language_code == language or pk not in slugs):
+                slugs[pk] = slug
+        return slugs
+
+    @classmethod
+    def get_absolute_urls(cls, products, language=None):
+        """
+        Batch resolver for the canonical URLs of the given products, for instance the slice of a
+        queryset.
+
+        :returns: A dict mapping the primary key of each product onto its canonical URL.
+        """
+        return cls.resolve_absolute_urls([product.pk for product in products], language)
+
+    @classmethod
+    def resolve_absolute_urls(cls, product_ids, language=None, slugs=None):
+        """
+        Instead of resolving each URL separately, this fetches the missing slugs, canonical CMS
+        pages and their titles using a fixed number of queries. Pass ``slugs``, if they already
+        have been fetched by the caller.
+
+        :returns: A dict mapping the primary key of each product onto its canonical URL.
+        """
+        from cms.models.pagemodel import Page
+
+        language = language or get_language()
+        missing = {cls.get_url_cache_key(pk, language): pk for pk in product_ids}
+        urls = {missing.pop(key): url for key, url in cache.get_many(list(missing.keys())).items()}
+        if not missing:
+            return urls
+
+        if slugs is None or not all(pk in slugs for pk in missing.values()):
+            fetched_slugs = cls.get_slugs(missing.values(), language)
+            fetched_slugs.update(slugs or {})
+            slugs = fetched_slugs
+
+        # sorting by highest level, so that the canonical URL associates with the most generic category
+        canonical_pages = {}
+        product_pages = cls.cms_pages.through.objects.filter(product_id__in=missing.values())
+        for product_id, page_id, path in product_pages.values_list('product_id', 'page_id', 'page__node__path'):
+            if product_id not in canonical_pages or path > canonical_pages[product_id][1]:
+                canonical_pages[product_id] = page_id, path
+        page_ids = [page_id for page_id, _ in canonical_pages.values()]
+        pages = Page.objects.filter(pk__in=page_ids).prefetch_related('title_set').in_bulk()
+        for page in pages.values():
+            page.title_cache = {title.language: title for title in page.title_set.all()}
+
+        resolved = {}
+        for cache_key, pk in missing.items():
+            try:
+                base_url = pages[canonical_pages[pk][0]].get_absolute_url(language)
+            except KeyError:
+                base_url = '/category-not-assigned/'
+            resolved[cache_key] = urls[pk] = urljoin(base_url, slugs.get(pk) or '')
+        cache.set_many(resolved, app_settings.CACHE_DURATIONS['product_url'])
+        return urls
+
+    @classmethod
+    def invalidate_absolute_urls(cls, product_ids):
+        """
+        Remove the cached canonical URLs for the given products in all languages.
+        """
+        if settings.USE_I18N:
+            languages = [language for language, _ in settings.LANGUAGES]
+        else:
+            languages = [settings.LANGUAGE_CODE]
+        cache.delete_many([cls.get_url_cache_key(pk, lang) for pk in product_ids for lang in languages])
+
+    def get_slug(self, language):
+        """
+        Return the slug of this product in the given language.
+        """
+        if callable(getattr(self, 'safe_translation_getter', None)):
+            return self.safe_translation_getter('slug', language_code=language, any_language=True)
+        return self.slug
+
+    def get_canonical_page(self):
+        """
+        Return the CMS page used to build the canonical URL of this product. If the CMS pages
+        have been prefetched, for instance by ``ProductModel.objects.catalog()``, they are taken
+        from there instead of querying the database.
+        """
+        try:
+            cms_pages = self._prefetched_objects_cache['cms_pages']
+        except (AttributeError, KeyError):
+            # sorting by highest level, so that the canonical URL
+            # associates with the most generic category
+            return self.cms_pages.order_by('node__path').last()
+        cms_page = max(cms_pages, key=lambda page: page.node.path, default=None)
+        if cms_page and not cms_page.title_cache:
+            try:
+                titles = cms_page._prefetched_objects_cache['title_set']
+            except (AttributeError, KeyError):
+                pass
+            else:
+                cms_page.title_cache = {title.language: title for title in titles}
+        return cms_page
+
     def get_absolute_url(self):
         """
         Return the absolute URL of a product
         """
-        # sorting by highest level, so that the canonical URL
-        # associates with the most generic category
-        cms_page = self.cms_pages.order_by('node__path').last()
-        if cms_page is None:
-            return urljoin('/category-not-assigned/', self.slug)
-        return urljoin(cms_page.get_absolute_url(), self.slug)
+        language = get_language()
+        cache_key = self.get_url_cache_key(self.pk, language)
+        url = cache.get(cache_key) if self.pk else None
+        if url is None:
+            cms_page = self.get_canonical_page() if self.pk else None
+            if cms_page is None:
+                url = urljoin('/category-not-assigned/', self.get_slug(language))
+            else:
+                url = urljoin(cms_page.get_absolute_url(language), self.get_slug(language))
+            if self.pk:
+                cache.set(cache_key, url, app_settings.CACHE_DURATIONS['product_url'])
+        return url
+
+    def save(self, *args, **kwargs):
+        from shop.cms_menus import invalidate_catalog_menus
+
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields).intersection(self.url_fields):
+            return
+        self.invalidate_absolute_urls([self.pk])
+        invalidate_catalog_menus(self.cms_pages.values_list('pk', flat=True))
+
+    def invalidate_cache(self):
+        super().invalidate_cache()
+        self.invalidate_absolute_urls([self.pk])
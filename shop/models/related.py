@@ -33,6 +33,36 @@ class BaseProductPage(models.Model, metaclass=deferred.ForeignKeyBuilder):
 ProductPageModel = deferred.MaterializedModel(BaseProductPage)
 
 
+def invalidate_product_page_urls(sender, instance, **kwargs):
+    """
+    Signal handler to invalidate the cached canonical URL of a product and the catalog menu of
+    the affected CMS page, after changing its categories.
+    """
+    from shop.cms_menus import invalidate_catalog_menus
+    from shop.models.product import CMSPageReferenceMixin
+
+    CMSPageReferenceMixin.invalidate_absolute_urls([instance.product_id])
+    invalidate_catalog_menus([instance.page_id])
+
+
+def invalidate_published_page_urls(sender, instance, **kwargs):
+    """
+    Signal handler to invalidate the cached canonical URLs of all products referring to a CMS
+    page or to one of its descendants, after that page has been published or unpublished. This
+    also invalidates the catalog menus attached to those pages.
+    """
+    from shop.cms_menus import invalidate_catalog_menus
+    from shop.models.product import CMSPageReferenceMixin
+
+    product_pages = ProductPageModel.objects.filter(page__node__path__startswith=instance.node.path)
+    product_ids, page_ids = set(), {instance.pk}
+    for product_id, page_id in product_pages.values_list('product_id', 'page_id'):
+        product_ids.add(product_id)
+        page_ids.add(page_id)
+    CMSPageReferenceMixin.invalidate_absolute_urls(product_ids)
+    invalidate_catalog_menus(page_ids)
+
+
 class BaseProductImage(models.Model, metaclass=deferred.ForeignKeyBuilder):
     """
     ManyToMany relation from the polymorphic Product to a set of images.
@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ProductIndexTaskManager(models.Manager):
+    def enqueue(self, product_ids):
+        """
+        Add the given products to the queue of products waiting to be indexed by Elasticsearch.
+        Products which are queued already, are coalesced into their existing entry.
+        """
+        product_ids = set(product_ids)
+        now = timezone.now()
+        with transaction.atomic():
+            queued = set(self.filter(product_id__in=product_ids).values_list('product_id', flat=True))
+            self.filter(product_id__in=queued).update(queued_at=now, attempts=0, last_error='')
+            try:
+                with transaction.atomic():
+                    self.bulk_create([self.model(product_id=pk, queued_at=now) for pk in product_ids - queued])
+            except IntegrityError:
+                # a concurrent request queued some of these products in the meantime
+                for pk in product_ids - queued:
+                    self.update_or_create(product_id=pk, defaults={'queued_at': now, 'attempts': 0, 'last_error': ''})
+
+    def pending(self, max_attempts, claim_timeout=None):
+        """
+        Return the tasks waiting to be indexed. With ``claim_timeout``, tasks claimed by a drainer
+        are skipped, unless that claim is older than ``claim_timeout`` seconds.
+        """
+        queryset = self.filter(attempts__lt=max_attempts)
+        if claim_timeout is not None:
+            expired = timezone.now() - timedelta(seconds=claim_timeout)
+            queryset = queryset.filter(Q(claimed_at__isnull=True) | Q(claimed_at__lt=expired))
+        return queryset.order_by('queued_at')
+
+
+class ProductIndexTask(models.Model):
+    """
+    A product waiting to be (re-)indexed by Elasticsearch. The queue is drained in batches by
+    :func:`shop.search.indexing.drain_index_queue`.
+    """
+    product_id = models.PositiveIntegerField(
+        _("Product ID"),
+        unique=True,
+    )
+
+    queued_at = models.DateTimeField(
+        _("Queued at"),
+        db_index=True,
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        _("Attempts"),
+        default=0,
+    )
+
+    last_error = models.TextField(
+        _("Last error"),
+        blank=True,
+    )
+
+    claimed_at = models.DateTimeField(
+        _("Claimed at"),
+        null=True,
+        blank=True,
+    )
+
+    objects = ProductIndexTaskManager()
+
+    class Meta:
+        app_label = 'shop'
+        verbose_name = _("Product index task")
+        verbose_name_plural = _("Product index tasks")
+
+    def __str__(self):
+        return str(self.product_id)
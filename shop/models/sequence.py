@@ -0,0 +1,50 @@
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+
+class NumberSequenceManager(models.Manager):
+    def next_value(self, name, initial=None):
+        """
+        Allocate the next value of the sequence named ``name``, creating that sequence if
+        required. Its first value follows the one returned by the callable ``initial``, if given.
+
+        The sequence is incremented inside the current transaction, which locks its row until
+        that transaction ends. Hence the allocated values are free of gaps, since a rolled back
+        transaction also releases its value, but only transactions allocating a value from the same
+        sequence wait for each other.
+        """
+        with transaction.atomic():
+            if not self.filter(name=name).update(value=F('value') + 1):
+                try:
+                    with transaction.atomic():
+                        self.create(name=name, value=(initial() if initial else 0) + 1)
+                except IntegrityError:
+                    # a concurrent transaction created this sequence in the meantime
+                    self.filter(name=name).update(value=F('value') + 1)
+            return self.filter(name=name).values_list('value', flat=True).get()
+
+
+class NumberSequence(models.Model):
+    """
+    A named counter used to allocate consecutive numbers, for instance for orders.
+    """
+    name = models.CharField(
+        _("Name"),
+        max_length=50,
+        unique=True,
+    )
+
+    value = models.PositiveIntegerField(
+        _("Value"),
+    )
+
+    objects = NumberSequenceManager()
+
+    class Meta:
+        app_label = 'shop'
+        verbose_name = _("Number sequence")
+        verbose_name_plural = _("Number sequences")
+
+    def __str__(self):
+        return "{}: {}".format(self.name, self.value)
@@ -20,11 +20,8 @@ class CartIncludeTaxModifier(BaseCartModifier):
         Add a field on cart.extra_price_fields:
         """
         amount = cart.subtotal * self.taxes
-        instance = {
-            'label': _("plus {}% VAT").format(app_settings.VALUE_ADDED_TAX),
-            'amount': amount,
-        }
-        cart.extra_rows[self.identifier] = ExtraCartRow(instance)
+        label = _("plus {}% VAT").format(app_settings.VALUE_ADDED_TAX)
+        cart.extra_rows[self.identifier] = ExtraCartRow(label=label, amount=amount)
         cart.total += amount
 
 
@@ -41,16 +38,10 @@ class CartExcludedTaxModifier(BaseCartModifier):
         Add a field on cart.extra_price_fields:
         """
         amount = cart.subtotal * self.taxes
-        instance = {
-            'label': _("{}% VAT incl.").format(app_settings.VALUE_ADDED_TAX),
-            'amount': amount,
-        }
-        cart.extra_rows[self.identifier] = ExtraCartRow(instance)
+        label = _("{}% VAT incl.").format(app_settings.VALUE_ADDED_TAX)
+        cart.extra_rows[self.identifier] = ExtraCartRow(label=label, amount=amount)
 
     def add_extra_cart_item_row(self, cart_item, request):
         amount = cart_item.line_total * self.taxes
-        instance = {
-            'label': _("{}% VAT incl.").format(app_settings.VALUE_ADDED_TAX),
-            'amount': amount,
-        }
-        cart_item.extra_rows[self.identifier] = ExtraCartRow(instance)
+        label = _("{}% VAT incl.").format(app_settings.VALUE_ADDED_TAX)
+        cart_item.extra_rows[self.identifier] = ExtraCartRow(label=label, amount=amount)
@@ -0,0 +1,71 @@
+"""
+Resolve the URLs of the CMS pages the shop refers to, such as the cart, the checkout or the list
+of orders. These pages are identified by their ``reverse_id``. The URLs are cached per language
+and invalidated whenever a CMS page is published or unpublished.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import NoReverseMatch, reverse
+
+from cms.models import Page
+from cms.utils.i18n import get_current_language
+
+from shop.conf import app_settings
+
+# maps the ``reverse_id`` of each page onto the apphook used to find that page otherwise
+SHOP_PAGES = {
+    'shop-cart': None,
+    'shop-checkout': None,
+    'shop-order': 'OrderApp',
+    'shop-search-product': 'CatalogSearchApp',
+    'password-reset-confirm': 'PasswordResetApp',
+}
+
+
+def get_cache_key(language):
+    return 'page_urls|{0}'.format(language)
+
+
+def resolve_page_url(reverse_id, language):
+    """
+    Return the URL of the published CMS page with the given ``reverse_id``, or of the first page
+    using the apphook configured for it in ``SHOP_PAGES``. If there is no such page, the URL is
+    reversed using ``reverse_id`` as URL name. If that fails too, an empty string is returned.
+    """
+    page = Page.objects.public().filter(reverse_id=reverse_id).first()
+    if page is None and SHOP_PAGES.get(reverse_id):
+        page = Page.objects.public().filter(application_urls=SHOP_PAGES[reverse_id]).first()
+    if page:
+        return page.get_absolute_url(language=language)
+    try:  # through hardcoded urlpatterns
+        return reverse(reverse_id)
+    except NoReverseMatch:
+        return ''
+
+
+def get_page_url(reverse_id, language=None):
+    """
+    Return the URL of the CMS page with the given ``reverse_id`` in the given language, which
+    defaults to the current language. Pages which can not be resolved, are cached as an empty
+    string; since publishing a page invalidates the cache, they are found as soon as added.
+    """
+    language = language or get_current_language()
+    cache_key = get_cache_key(language)
+    urls = cache.get(cache_key) or {}
+    if reverse_id in urls:
+        return urls[reverse_id]
+    urls[reverse_id] = resolve_page_url(reverse_id, language)
+    cache.set(cache_key, urls, app_settings.CACHE_DURATIONS['page_url'])
+    return urls[reverse_id]
+
+
+def invalidate_page_urls(sender=None, **kwargs):
+    """
+    Signal handler removing the cached page URLs in all languages, whenever a CMS page is
+    published or unpublished.
+    """
+    if settings.USE_I18N:
+        languages = [language for language, _ in settings.LANGUAGES]
+    else:
+        languages = [settings.LANGUAGE_CODE]
+    cache.delete_many([get_cache_key(language) for language in languages])
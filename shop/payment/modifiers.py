@@ -66,7 +66,7 @@ class PaymentModifier(BaseCartModifier):
             cart = CartModel.objects.get_from_request(context['request'])
             if self.is_active(cart.extra.get('payment_modifier')):
                 cart.update(context['request'])
-                data = cart.extra_rows[self.identifier].data
+                data = cart.extra_rows[self.identifier].to_dict()
                 data.update(modifier=self.identifier)
                 context['payment_modifiers']['initial_row'] = data
         except (KeyError, CartModel.DoesNotExist):
@@ -8,8 +8,7 @@ from cmsplus.forms import PlusPluginFormBase, get_style_form_fields
 from cmsplus.plugin_base import StylePluginMixin, PlusPluginBase
 
 from shop.conf import app_settings
-from shop.models.cart import CartModel
-from shop.serializers.cart import CartSerializer
+from shop.serializers.cart import CartItems, get_cart_summary
 
 
 class ShopCartPluginForm(PlusPluginFormBase):
@@ -63,17 +62,16 @@ class ShopCartPlugin(StylePluginMixin, PlusPluginBase):
 
     def render(self, context, instance, placeholder):
         try:
-            cart = CartModel.objects.get_from_request(context['request'])
-            context['is_cart_filled'] = cart.items.exists()
-            render_type = instance.glossary['render_type']
+            cart_summary = get_cart_summary(context['request'])
+        except KeyError:
+            return super().render(context, instance, placeholder)
+        if cart_summary.cart:
+            context['is_cart_filled'] = cart_summary.lazy_is_filled()
+            render_type = instance.glossary.get('render_type')
             if render_type == 'static':
                 # update context for static cart with items to be endered as HTML
-                cart_serializer = CartSerializer(cart, context=context, label='cart', with_items=True)
-                context['cart'] = cart_serializer.data
+                context['cart'] = cart_summary.lazy_data(label='cart', with_items=CartItems.arranged)
             elif render_type == 'summary':
                 # update context for cart summary to be endered as HTML
-                cart_serializer = CartSerializer(cart, context=context, label='cart')
-                context['cart'] = cart_serializer.data
-        except (KeyError, CartModel.DoesNotExist):
-            pass
+                context['cart'] = cart_summary.lazy_data(label='cart')
         return super().render(context, instance, placeholder)
@@ -9,8 +9,7 @@ from cmsplus.cms_plugins.generic.icon import IconField, get_icon_style_paths
 from cmsplus.plugin_base import StylePluginMixin, PlusPluginBase
 
 from shop.conf import app_settings
-from shop.models.cart import CartModel
-from shop.serializers.cart import CartSerializer
+from shop.serializers.cart import CartItems, get_cart_summary
 
 import logging
 logger = logging.getLogger('shop')
@@ -60,22 +59,22 @@ class CheckoutShippingAddressPlugin(StylePluginMixin, PlusPluginBase):
 
     def render(self, context, instance, placeholder):
         try:
-            cart = CartModel.objects.get_from_request(context['request'])
-            context['is_cart_filled'] = cart.items.exists()
-
+            cart_summary = get_cart_summary(context['request'])
+        except KeyError:
+            return super().render(context, instance, placeholder)
+        cart = cart_summary.cart
+        if cart:
             if not cart.shipping_address:
                 # try to set shipping address if exist
                 cart.shipping_address = context['request'].customer.shippingaddress_set.first()
                 cart.save()
+                cart_summary.invalidate()
 
+            context['is_cart_filled'] = cart_summary.lazy_is_filled()
             context['address'] = cart.shipping_address
 
             # update context for static cart with items to be endered as HTML
-            cart_serializer = CartSerializer(cart, context=context, label='cart', with_items=True)
-            context['cart'] = cart_serializer.data
-
-        except (KeyError, CartModel.DoesNotExist):
-            pass
+            context['cart'] = cart_summary.lazy_data(label='cart', with_items=CartItems.arranged)
         return super().render(context, instance, placeholder)
 
 
@@ -99,16 +98,16 @@ class CheckoutPaymentPlugin(StylePluginMixin, PlusPluginBase):
 
     def render(self, context, instance, placeholder):
         try:
-            cart = CartModel.objects.get_from_request(context['request'])
-            context['is_cart_filled'] = cart.items.exists()
+            cart_summary = get_cart_summary(context['request'])
+        except KeyError:
+            return super().render(context, instance, placeholder)
+        cart = cart_summary.cart
+        if cart:
+            context['is_cart_filled'] = cart_summary.lazy_is_filled()
             context['address'] = cart.billing_address or cart.shipping_address
 
             # update context for static cart with items to be endered as HTML
-            cart_serializer = CartSerializer(cart, context=context, label='cart', with_items=True)
-            context['cart'] = cart_serializer.data
-
-        except (KeyError, CartModel.DoesNotExist):
-            pass
+            context['cart'] = cart_summary.lazy_data(label='cart', with_items=CartItems.arranged)
         return super().render(context, instance, placeholder)
 
 
@@ -201,7 +200,7 @@ class CheckoutButtonPluginBase(StylePluginMixin, PlusPluginBase):
                 context['icon_right'] = format_html('&nbsp; <i class="{}"></i>'.format(icon))
 
         try:
-            context['cart'] = CartModel.objects.get_from_request(context['request'])
+            context['cart'] = get_cart_summary(context['request']).cart or {'is_empty': True}
         except Exception:
             context['cart'] = {'is_empty': True}
         return super().render(context, instance, placeholder)
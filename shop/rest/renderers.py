@@ -1,8 +1,7 @@
 from rest_framework import renderers
 from rest_framework.exceptions import APIException
 
-from shop.models.cart import CartModel
-from shop.serializers.cart import CartSerializer
+from shop.serializers.cart import get_cart_summary
 
 
 class TemplateContextMixin:
@@ -48,12 +47,12 @@ class ShopTemplateHTMLRenderer(TemplateContextMixin, renderers.TemplateHTMLRende
 
     def update_with_cart_context(self, context):
         try:
-            cart = CartModel.objects.get_from_request(context['request'])
-            context['is_cart_filled'] = cart.items.exists()
-            cart_serializer = CartSerializer(cart, context=context, label='cart')
-            context['cart'] = cart_serializer.data
-        except (KeyError, CartModel.DoesNotExist):
-            pass
+            cart_summary = get_cart_summary(context['request'])
+        except KeyError:
+            return
+        # the cart is only serialized, if the template accesses it
+        context['is_cart_filled'] = cart_summary.lazy_is_filled()
+        context['cart'] = cart_summary.lazy_data(label='cart')
 
 
 class CMSPageRenderer(TemplateContextMixin, renderers.TemplateHTMLRenderer):
@@ -1,20 +1,45 @@
-from elasticsearch_dsl.analysis import analyzer, token_filter
-
-body_analyzers = {
-    'default': analyzer('default_analyzer',
-        tokenizer='standard',
-        filter=['lowercase', 'stop', 'snowball'],
-        char_filter=['html_strip'],
-    ),
-    'de': analyzer('german_analyzer',
-        type='custom',
-        tokenizer='standard',
-        filter=[
+"""
+Analyzers used to create the full text search index from the body of each product. They are
+declared using the Elasticsearch analysis syntax, so that the embedded search backend in
+:mod:`shop.search.embedded` can apply the same configuration.
+"""
+analyzer_definitions = {
+    'default': {
+        'name': 'default_analyzer',
+        'tokenizer': 'standard',
+        'filter': ['lowercase', 'stop', 'snowball'],
+        'char_filter': ['html_strip'],
+    },
+    'de': {
+        'name': 'german_analyzer',
+        'type': 'custom',
+        'tokenizer': 'standard',
+        'filter': [
             'lowercase',
-            token_filter('asciifolding', type='asciifolding', preserve_original=False),
-            token_filter('german_stop', type='stop', language='german'),
-            token_filter('german_stemmer', type='snowball', language='german'),
+            {'name': 'asciifolding', 'type': 'asciifolding', 'preserve_original': False},
+            {'name': 'german_stop', 'type': 'stop', 'language': 'german'},
+            {'name': 'german_stemmer', 'type': 'snowball', 'language': 'german'},
         ],
-        char_filter=['html_strip'],
-    ),
+        'char_filter': ['html_strip'],
+    },
 }
+
+
+def build_analyzer(definition):
+    from elasticsearch_dsl.analysis import analyzer, token_filter
+
+    def build_filter(params):
+        if isinstance(params, str):
+            return params
+        params = dict(params)
+        return token_filter(params.pop('name'), **params)
+
+    params = dict(definition)
+    params['filter'] = [build_filter(f) for f in params['filter']]
+    return analyzer(params.pop('name'), **params)
+
+
+try:
+    body_analyzers = {key: build_analyzer(d) for key, d in analyzer_definitions.items()}
+except ImportError:
+    body_analyzers = {}  # Elasticsearch is not installed
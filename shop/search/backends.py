@@ -0,0 +1,67 @@
+from functools import lru_cache
+
+from shop.conf import app_settings
+
+
+class SearchBackend:
+    """
+    Interface for the backends used to index and search for products. The search views access
+    the index through the document returned by ``get_document()``, whose ``search()`` method must
+    offer the subset of the elasticsearch-dsl ``Search`` API used by :mod:`shop.search.mixins`.
+    """
+    def get_document(self, language):
+        """
+        Return the document used to search for products in the given language.
+        """
+        raise NotImplementedError("{} must implement method `.get_document()`.".format(self.__class__))
+
+    def index_products(self, product_ids):
+        """
+        Index the given products. Products which do not exist anymore or have been deactivated,
+        must be removed from the index.
+
+        :returns: A dict mapping the IDs of the products which could not be indexed onto their error.
+        """
+        raise NotImplementedError("{} must implement method `.index_products()`.".format(self.__class__))
+
+    def rebuild_index(self, processes=None, shard_size=1000):
+        """
+        Rebuild the index for all active products without interrupting searches.
+
+        :returns: A generator yielding the number of indexed products for each shard.
+        """
+        raise NotImplementedError("{} must implement method `.rebuild_index()`.".format(self.__class__))
+
+
+class ElasticsearchBackend(SearchBackend):
+    """
+    Search backend using the Elasticsearch documents created by
+    :class:`shop.search.documents.ProductDocument`.
+    """
+    def get_document(self, language):
+        from django_elasticsearch_dsl.registries import registry
+        from shop.models.product import ProductModel
+
+        documents = registry.get_documents([ProductModel])
+        try:
+            return next(doc for doc in documents if doc._language == language)
+        except StopIteration:
+            return next(doc for doc in documents if doc._language is None)
+
+    def index_products(self, product_ids):
+        from shop.search.indexing import index_products
+
+        return index_products(product_ids)
+
+    def rebuild_index(self, processes=None, shard_size=1000):
+        from shop.search.indexing import rebuild_indices
+
+        return rebuild_indices(processes=processes, shard_size=shard_size)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    """
+    Return the search backend configured by setting ``SHOP_SEARCH_BACKEND``.
+    """
+    return app_settings.SEARCH_BACKEND()
@@ -0,0 +1,111 @@
+from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.template.loader import select_template
+from django.utils import translation
+
+from shop.conf import app_settings
+from shop.templatetags.shop_search_tags import EmulateHttpRequest
+
+
+def get_product_version(product):
+    """
+    Return the modification date of the given product in milliseconds, which is the precision
+    Elasticsearch stores dates with.
+    """
+    return int(product.updated_at.timestamp() * 1000)
+
+
+def get_version_cache_key(product_id):
+    return 'product:{}|version'.format(product_id)
+
+
+def remember_product_version(sender, instance, **kwargs):
+    """
+    Signal handler keeping the version of each saved product in the cache. Search results served
+    from their indexed document are compared against it, in order to detect products modified
+    after they have been indexed.
+    """
+    from shop.models.product import BaseProduct
+
+    if isinstance(instance, BaseProduct):
+        cache.set(get_version_cache_key(instance.pk), get_product_version(instance), None)
+
+
+class SummaryRequest(EmulateHttpRequest):
+    """
+    Emulated request used to serialize the product summaries while indexing. Its host is the
+    domain of the current site.
+    """
+    def __init__(self, language_code, host):
+        super().__init__(language_code)
+        self._host = host
+
+    def get_host(self):
+        return self._host
+
+
+class ProductDocumentMixin:
+    """
+    Prepare the fields of a product to be indexed by a search backend. This is shared by the
+    Elasticsearch documents and by the embedded search backend.
+    """
+    _schema_version = 1  # increase, whenever the stored summary changes its structure
+
+    _body_templates = {}  # resolved templates by app label and product model
+
+    def prepare_product_code(self, instance):
+        """
+        Create a list of textual representation for product codes. If the variants have been
+        fetched in bulk using ``get_product_variants_in_bulk()``, they are taken from there.
+        """
+        has_valid_product_code = lambda obj: isinstance(getattr(obj, 'product_code', None), str)
+        try:
+            variants = self._product_variants[instance.pk]
+        except (AttributeError, KeyError):
+            variants = instance.get_product_variants()
+        product_codes = [v.product_code for v in variants if has_valid_product_code(v)]
+        if has_valid_product_code(instance):
+            product_codes.append(instance.product_code)
+        return product_codes
+
+    def prepare_body(self, instance):
+        """
+        Create a textual representation of the product's instance to be used by the search
+        backend for creating a full text search index.
+        """
+        app_label = instance._meta.app_label.lower()
+        try:
+            template = self._body_templates[app_label, instance.product_model]
+        except KeyError:
+            params = [
+                (app_label, instance.product_model),
+                (app_label, 'product'),
+                ('shop', 'product'),
+            ]
+            template = select_template(['{0}/search/indexes/{1}.txt'.format(*p) for p in params])
+            self._body_templates[app_label, instance.product_model] = template
+        body = template.render({'product': instance})
+        return body
+
+    def prepare_summary(self, instance):
+        """
+        Serialize the product's summary, so that search results can be rendered straight from
+        the indexed document, without having to query the database.
+        """
+        serializer_class = app_settings.PRODUCT_SUMMARY_SERIALIZER
+        serializer = serializer_class(instance, context={'request': self.get_summary_request()}, label='search')
+        return dict(serializer.data)
+
+    def prepare_schema_version(self, instance):
+        return self._schema_version
+
+    def prepare_updated_at(self, instance):
+        return get_product_version(instance)
+
+    def get_summary_request(self):
+        try:
+            return self._summary_request
+        except AttributeError:
+            host = Site.objects.get_current().domain
+            self._summary_request = SummaryRequest(translation.get_language(), host)
+            return self._summary_request
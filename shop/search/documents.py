@@ -1,4 +1,3 @@
-from django.template.loader import select_template
 from django.utils import translation
 
 from django_elasticsearch_dsl import fields, Document, Index
@@ -7,9 +6,10 @@ from elasticsearch.exceptions import NotFoundError
 from shop.conf import app_settings
 from shop.models.product import ProductModel
 from shop.search.analyzers import body_analyzers
+from shop.search.base import ProductDocumentMixin
 
 
-class _ProductDocument(Document):
+class _ProductDocument(ProductDocumentMixin, Document):
     product_code = fields.KeywordField(
         multi=True,
         boost=3,
@@ -21,6 +21,15 @@ class _ProductDocument(Document):
 
     product_type = fields.TextField()
 
+    # stored, but not indexed: the serialized product summary, including its rendered media snippet
+    summary = fields.ObjectField(enabled=False)
+
+    # used to detect documents indexed before their product was modified
+    updated_at = fields.LongField()
+
+    # used to detect documents indexed before their summary changed its structure
+    schema_version = fields.IntegerField()
+
     class Django:
         model = ProductModel
         fields = ['id']
@@ -34,31 +43,12 @@ class _ProductDocument(Document):
         queryset = super().get_queryset()
         return queryset.filter(active=True)
 
-    def prepare_product_code(self, instance):
-        """
-        Create a list of textual representation for product codes.
-        """
-        has_valid_product_code = lambda obj: isinstance(getattr(obj, 'product_code', None), str)
-        variants = instance.get_product_variants()
-        product_codes = [v.product_code for v in variants if has_valid_product_code(v)]
-        if has_valid_product_code(instance):
-            product_codes.append(instance.product_code)
-        return product_codes
-
-    def prepare_body(self, instance):
+    def is_stale(self):
         """
-        Create a textual representation of the product's instance to be used by Elasticsearch for
-        creating a full text search index.
+        Return ``True``, if this document has been indexed before its stored summary changed its
+        structure. Then the summary must be serialized from the database instead.
         """
-        app_label = instance._meta.app_label.lower()
-        params = [
-            (app_label, instance.product_model),
-            (app_label, 'product'),
-            ('shop', 'product'),
-        ]
-        template = select_template(['{0}/search/indexes/{1}.txt'.format(*p) for p in params])
-        body = template.render({'product': instance})
-        return body
+        return getattr(self, 'schema_version', None) != self._schema_version or not getattr(self, 'summary', None)
 
     def update(self, thing, refresh=None, action='index', parallel=False, **kwargs):
         if isinstance(thing, ProductModel._materialized_model) and thing.active is False:
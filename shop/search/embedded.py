@@ -0,0 +1,340 @@
+"""
+Embedded search backend, used if Elasticsearch is not available, for instance on staging or
+small deployments. Products are analyzed in Python using the analyzer definitions from
+:mod:`shop.search.analyzers` and stored in a SQLite FTS5 table, which answers ``multi_match``
+queries ranked by BM25 using the same field boosts as the Elasticsearch documents.
+
+Stemming requires the optional package ``snowballstemmer``. Without it, tokens are not stemmed.
+"""
+from contextlib import closing
+from html import unescape
+from itertools import groupby
+import json
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.db.models import Case, When
+from django.utils import translation
+from django.utils.html import strip_tags
+
+try:
+    import snowballstemmer
+except ImportError:
+    snowballstemmer = None
+
+from shop.conf import app_settings
+from shop.models.product import ProductModel
+from shop.search.analyzers import analyzer_definitions
+from shop.search.backends import SearchBackend
+from shop.search.base import ProductDocumentMixin
+
+STOPWORDS = {
+    'english': {
+        'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in', 'into', 'is',
+        'it', 'no', 'not', 'of', 'on', 'or', 'such', 'that', 'the', 'their', 'then', 'there',
+        'these', 'they', 'this', 'to', 'was', 'will', 'with',
+    },
+    'german': {
+        'aber', 'als', 'am', 'an', 'auch', 'auf', 'aus', 'bei', 'bin', 'bis', 'bist', 'da', 'damit',
+        'dann', 'das', 'dass', 'dem', 'den', 'denn', 'der', 'des', 'die', 'dies', 'diese',
+        'dieser', 'dieses', 'doch', 'dort', 'du', 'durch', 'ein', 'eine', 'einem', 'einen',
+        'einer', 'eines', 'er', 'es', 'euer', 'eure', 'fur', 'hatte', 'hatten', 'hattest', 'hattet',
+        'hier', 'hinter', 'ich', 'ihr', 'ihre', 'im', 'in', 'ist', 'ja', 'jede', 'jedem', 'jeden',
+        'jeder', 'jedes', 'jener', 'jenes', 'jetzt', 'kann', 'kannst', 'konnen', 'konnt', 'machen',
+        'mein', 'meine', 'mit', 'muss', 'musst', 'nach', 'nachdem', 'nein', 'nicht', 'nun', 'oder',
+        'seid', 'sein', 'seine', 'sich', 'sie', 'sind', 'soll', 'sollen', 'sollst', 'sollt',
+        'sonst', 'soweit', 'sowie', 'und', 'unser', 'unsere', 'unter', 'vom', 'von', 'vor', 'wann',
+        'warum', 'was', 'weiter', 'weitere', 'wenn', 'wer', 'werde', 'werden', 'werdet', 'weshalb',
+        'wie', 'wieder', 'wieso', 'wir', 'wird', 'wirst', 'wo', 'woher', 'wohin', 'zu', 'zum',
+        'zur', 'uber',
+    },
+}
+
+# columns of the full text table, together with their boost factors used for ranking
+COLUMNS = [('product_code', 3.0), ('product_name', 2.0), ('product_type', 1.0), ('body', 1.0)]
+
+# serializes the writes into the index file, which otherwise would fail with "database is locked"
+write_lock = threading.Lock()
+
+
+class TextAnalyzer:
+    """
+    Python implementation of the subset of the Elasticsearch analysis chain used by the analyzer
+    definitions: char filter ``html_strip``, tokenizer ``standard`` and the token filters
+    ``lowercase``, ``asciifolding``, ``stop`` and ``snowball``.
+    """
+    token_pattern = re.compile(r'\w+')
+
+    def __init__(self, definition):
+        self.char_filters = definition.get('char_filter', [])
+        self.token_filters = []
+        for params in definition.get('filter', []):
+            if isinstance(params, str):
+                params = {'type': params}
+            filter_type = params.get('type')
+            if filter_type == 'lowercase':
+                self.token_filters.append(str.lower)
+            elif filter_type == 'asciifolding':
+                self.token_filters.append(self.fold_ascii)
+            elif filter_type == 'stop':
+                stopwords = STOPWORDS.get(params.get('language', 'english'), set())
+                self.token_filters.append(lambda token, stopwords=stopwords: None if token in stopwords else token)
+            elif filter_type == 'snowball' and snowballstemmer:
+                stemmer = snowballstemmer.stemmer(params.get('language', 'english'))
+                self.token_filters.append(stemmer.stemWord)
+
+    @staticmethod
+    def fold_ascii(token):
+        normalized = unicodedata.normalize('NFKD', token)
+        return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+    def analyze(self, text):
+        if 'html_strip' in self.char_filters:
+            text = unescape(strip_tags(text))
+        tokens = []
+        for token in self.token_pattern.findall(text):
+            for token_filter in self.token_filters:
+                token = token_filter(token)
+                if not token:
+                    break
+            else:
+                tokens.append(token)
+        return tokens
+
+
+class EmbeddedSummary(dict):
+    def to_dict(self):
+        return dict(self)
+
+
+class EmbeddedHit:
+    """
+    A search result, offering the same attributes as a hit returned by Elasticsearch.
+    """
+    class Meta:
+        def __init__(self, id, score):
+            self.id = id
+            self.score = score
+
+    def __init__(self, product_id, score, summary, updated_at, schema_version):
+        self.meta = self.Meta(product_id, score)
+        self.summary = EmbeddedSummary(json.loads(summary)) if summary else None
+        self.updated_at = updated_at
+        self.schema_version = schema_version
+
+    def is_stale(self):
+        return self.schema_version != ProductDocumentMixin._schema_version or not self.summary
+
+
+class EmbeddedSearch:
+    """
+    Emulates the subset of the elasticsearch-dsl ``Search`` API used by the search views. As with
+    Elasticsearch, searches are lazy and can be sliced and counted by the paginator.
+    """
+    def __init__(self, document, match=None, start=0, stop=None):
+        self.document = document
+        self.match = match
+        self.start = start
+        self.stop = stop
+
+    def _clone(self, **kwargs):
+        params = dict(match=self.match, start=self.start, stop=self.stop)
+        params.update(kwargs)
+        return type(self)(self.document, **params)
+
+    def source(self, **kwargs):
+        return self._clone()
+
+    def query(self, name, query='', fields=(), type=None, **kwargs):
+        """
+        Emulate a ``multi_match`` query. With ``type='bool_prefix'``, the last term is matched
+        as prefix, as required for search-as-you-type. Other types of queries are translated into
+        a ``multi_match`` query by :meth:`translate_query`.
+        """
+        if name != 'multi_match':
+            return self.query('multi_match', *self.translate_query(name, query, fields, kwargs))
+        columns = [c for c, _ in COLUMNS if c in fields] or [c for c, _ in COLUMNS]
+        terms = self.document.analyze_query(query)
+        if not terms:
+            return self._clone(match='')
+        expressions = ['"{}"'.format(term.replace('"', '""')) for term in terms]
+        if type == 'bool_prefix':
+            expressions[-1] += '*'
+        match = '{{{0}}} : ({1})'.format(' '.join(columns), ' OR '.join(expressions))
+        return self._clone(match=match)
+
+    @staticmethod
+    def translate_query(name, query, fields, params):
+        """
+        Return the query string, fields and type of the ``multi_match`` query nearest to the
+        given query. The full text queries on a single field and the query string queries are
+        translated; for any other query, its terms are matched against the product's name and code.
+        """
+        if name in ('query_string', 'simple_query_string'):
+            return query, fields, None
+        prefix_queries = ('prefix', 'match_bool_prefix', 'match_phrase_prefix')
+        if name in ('match', 'match_phrase') + prefix_queries and len(params) == 1:
+            field, value = next(iter(params.items()))
+            if isinstance(value, dict):
+                value = value.get('query', value.get('value', ''))
+            return str(value), [field], 'bool_prefix' if name in prefix_queries else None
+
+        def get_terms(value):
+            if isinstance(value, dict):
+                value = list(value.values())
+            if isinstance(value, (list, tuple)):
+                return [term for item in value for term in get_terms(item)]
+            return [value] if isinstance(value, str) else []
+
+        return ' '.join(get_terms([query, params])), ['product_name', 'product_code'], None
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step:
+            raise TypeError("Search results can only be sliced without step.")
+        start = self.start + (key.start or 0)
+        stop = self.stop if key.stop is None else self.start + key.stop
+        if self.stop is not None and stop is not None:
+            stop = min(stop, self.stop)
+        return self._clone(start=start, stop=stop)
+
+    def _where(self):
+        if self.match is None:
+            return "language = ?", [self.document.language_key]
+        return "products MATCH ? AND language = ?", [self.match, self.document.language_key]
+
+    def count(self):
+        if self.match == '':
+            return 0
+        where, params = self._where()
+        with self.document.backend.connect() as connection:
+            return connection.execute("SELECT count(*) FROM products WHERE " + where, params).fetchone()[0]
+
+    def execute(self):
+        if self.match == '':
+            return []
+        where, params = self._where()
+        if self.match is None:
+            score = '0'  # ranking functions are only available for full text queries
+        else:
+            score = 'bm25(products, {})'.format(', '.join(str(boost) for _, boost in COLUMNS))
+        limit = -1 if self.stop is None else max(self.stop - self.start, 0)
+        sql = ("SELECT product_id, {0} AS score, summary, updated_at, schema_version FROM products "
+               "WHERE {1} ORDER BY score, product_id LIMIT ? OFFSET ?").format(score, where)
+        with self.document.backend.connect() as connection:
+            rows = connection.execute(sql, params + [limit, self.start]).fetchall()
+        return [EmbeddedHit(*row) for row in rows]
+
+    def __iter__(self):
+        return iter(self.execute())
+
+    def to_queryset(self):
+        product_ids = [hit.meta.id for hit in self.execute()]
+        preserved_order = Case(*[When(pk=pk, then=pos) for pos, pk in enumerate(product_ids)])
+        return ProductModel.objects.filter(pk__in=product_ids).order_by(preserved_order)
+
+
+class EmbeddedProductDocument(ProductDocumentMixin):
+    """
+    Prepares products for the embedded search backend and offers the ``search()`` method used by
+    the search views.
+    """
+    def __init__(self, backend, language):
+        self.backend = backend
+        self._language = language
+        self.language_key = language or ''
+        definition = analyzer_definitions.get(language, analyzer_definitions['default'])
+        self.body_analyzer = TextAnalyzer(definition)
+        self.keyword_analyzer = TextAnalyzer({'filter': ['lowercase']})
+
+    def search(self):
+        return EmbeddedSearch(self)
+
+    def analyze_query(self, query):
+        # product codes are not stemmed, hence the query must match them unstemmed too
+        return list(dict.fromkeys(self.keyword_analyzer.analyze(query) + self.body_analyzer.analyze(query)))
+
+    def prepare(self, instance):
+        return (
+            ' '.join(self.keyword_analyzer.analyze(' '.join(self.prepare_product_code(instance)))),
+            ' '.join(self.body_analyzer.analyze(instance.product_name or '')),
+            ' '.join(self.body_analyzer.analyze(instance.product_type())),
+            ' '.join(self.body_analyzer.analyze(self.prepare_body(instance))),
+            instance.pk,
+            self.language_key,
+            json.dumps(self.prepare_summary(instance)),
+            self.prepare_updated_at(instance),
+            self._schema_version,
+        )
+
+
+class EmbeddedSearchBackend(SearchBackend):
+    """
+    Search backend keeping its index in the SQLite database file configured by setting
+    ``SHOP_EMBEDDED_SEARCH_INDEX``.
+    """
+    def __init__(self, path=None):
+        self.path = path or app_settings.EMBEDDED_SEARCH_INDEX
+
+    def connect(self, path=None):
+        connection = sqlite3.connect(path or self.path)
+        connection.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products USING fts5({}, product_id UNINDEXED, "
+            "language UNINDEXED, summary UNINDEXED, updated_at UNINDEXED, schema_version UNINDEXED)".format(
+                ', '.join(c for c, _ in COLUMNS))
+        )
+        return closing(connection)
+
+    def get_languages(self):
+        if settings.USE_I18N:
+            return [language for language, _ in settings.LANGUAGES]
+        return [None]
+
+    def get_document(self, language):
+        return EmbeddedProductDocument(self, language if language in self.get_languages() else None)
+
+    def _prepare(self, products):
+        rows = []
+        for language in self.get_languages():
+            document = EmbeddedProductDocument(self, language)
+            with translation.override(language):
+                rows.extend(document.prepare(product) for product in products)
+        return rows
+
+    def _write(self, connection, product_ids, rows):
+        # older versions of SQLite limit the number of variables in a statement to 999
+        for k in range(0, len(product_ids), 900):
+            chunk = product_ids[k:k + 900]
+            placeholders = ', '.join('?' * len(chunk))
+            connection.execute("DELETE FROM products WHERE product_id IN ({})".format(placeholders), chunk)
+        connection.executemany("INSERT INTO products VALUES ({})".format(', '.join('?' * 9)), rows)
+
+    def index_products(self, product_ids):
+        products = [p for p in ProductModel.objects.filter(pk__in=product_ids) if p.active]
+        rows = self._prepare(products)
+        with write_lock, self.connect() as connection, connection:
+            self._write(connection, list(set(product_ids)), rows)
+        return {}
+
+    def rebuild_index(self, processes=None, shard_size=1000):
+        """
+        Rebuild the index into a new database file, which then atomically replaces the current
+        one. The embedded backend always runs in a single process.
+        """
+        path = self.path + '.new'
+        if os.path.exists(path):
+            os.remove(path)
+        queryset = ProductModel.objects.indexable().order_by('pk')
+        with self.connect(path) as connection:
+            for _, chunk in groupby(enumerate(queryset.iterator(chunk_size=shard_size)),
+                                    key=lambda item: item[0] // shard_size):
+                products = [product for _, product in chunk]
+                with connection:
+                    # the products are written into a new file, hence there is nothing to delete
+                    self._write(connection, [], self._prepare(products))
+                yield len(products)
+        with write_lock:
+            os.replace(path, self.path)
@@ -0,0 +1,263 @@
+from itertools import groupby
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone, translation
+
+from shop.conf import app_settings
+from shop.models.product import ProductModel
+from shop.models.search import ProductIndexTask
+from shop.search.backends import get_search_backend
+
+import logging
+logger = logging.getLogger('shop')
+
+
+def get_product_documents():
+    """
+    Return a dict mapping each language onto the document class used to index the products in
+    that language. Without internationalization, the only key is ``None``.
+    """
+    from django_elasticsearch_dsl.registries import registry
+
+    documents = registry.get_documents([ProductModel])
+    if not settings.USE_I18N:
+        return {None: next(iter(documents))}
+    default_document = next((doc for doc in documents if doc._language is None), None)
+    return {
+        language: next((doc for doc in documents if doc._language == language), default_document)
+        for language, _ in settings.LANGUAGES
+    }
+
+
+def index_products(product_ids):
+    """
+    Index the given products into Elasticsearch using one bulk request per index and language. Products which
+    do not exist anymore or have been deactivated, are removed from the index.
+
+    :returns: A dict mapping the IDs of the products which could not be indexed onto their error.
+    """
+    products = [p for p in ProductModel.objects.filter(pk__in=product_ids) if p.active]
+    removed_ids = set(product_ids).difference(p.pk for p in products)
+    failed = {}
+    for document_class in set(get_product_documents().values()):
+        document = document_class()
+        if document._language:
+            with translation.override(document._language):
+                actions = list(document._get_actions(products, 'index'))
+        else:
+            actions = list(document._get_actions(products, 'index'))
+        actions.extend({
+            '_op_type': 'delete',
+            '_index': document._index._name,
+            '_id': pk,
+        } for pk in removed_ids)
+        _, errors = document.bulk(actions, raise_on_error=False)
+        for error in errors:
+            op_type, details = next(iter(error.items()))
+            if op_type == 'delete' and details.get('status') == 404:
+                continue  # product was not indexed anyway
+            logger.warning("Failed to index product {_id}: {error}".format(**details))
+            failed[int(details['_id'])] = str(details.get('error'))
+    return failed
+
+
+def drain_index_queue(batch_size=None, max_attempts=None):
+    """
+    Index all products waiting in the queue, in batches of ``batch_size`` products. Products
+    which fail to be indexed remain in the queue and are retried on the next run, until they
+    reach ``max_attempts``.
+
+    :returns: A tuple containing the number of indexed and failed products.
+    """
+    options = app_settings.SEARCH_INDEX_QUEUE
+    batch_size = batch_size or options['batch_size']
+    max_attempts = max_attempts or options['max_attempts']
+    indexed, failed_ids = 0, set()
+    # concurrent drainers skip the tasks claimed by each other, where the database supports it
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    while True:
+        started_at = timezone.now()
+        # claim a batch of tasks using a short transaction, so that no lock is held while indexing
+        with transaction.atomic():
+            tasks = ProductIndexTask.objects.pending(max_attempts, options['claim_timeout'])
+            tasks = tasks.exclude(product_id__in=failed_ids).select_for_update(skip_locked=skip_locked)
+            tasks = dict(tasks.values_list('product_id', 'pk')[:batch_size])
+            ProductIndexTask.objects.filter(pk__in=list(tasks.values())).update(claimed_at=started_at)
+        if not tasks:
+            break
+        try:
+            failed = get_search_backend().index_products(list(tasks))
+        except Exception as exc:
+            logger.warning("Failed to index products: {}".format(exc))
+            failed = {pk: str(exc) for pk in tasks}
+        with transaction.atomic():
+            for product_id, error in failed.items():
+                ProductIndexTask.objects.filter(pk=tasks.pop(product_id)).update(
+                    attempts=F('attempts') + 1,
+                    last_error=error,
+                    claimed_at=None,
+                )
+            # products queued again while being indexed remain in the queue
+            ProductIndexTask.objects.filter(pk__in=list(tasks.values()), queued_at__lte=started_at).delete()
+            ProductIndexTask.objects.filter(pk__in=list(tasks.values())).update(claimed_at=None)
+        indexed += len(tasks)
+        failed_ids.update(failed)
+    return indexed, len(failed_ids)
+
+
+class BackgroundDrainer:
+    """
+    Drains the indexing queue by at most one background thread per process. Wake-ups arriving
+    while that thread is running, make it drain the queue once more before it terminates.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = False
+
+    def wake(self):
+        with self._lock:
+            self._pending = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        return
+                    self._pending = False
+                try:
+                    drain_index_queue()
+                except Exception as exc:
+                    logger.exception(str(exc))
+        finally:
+            connection.close()
+
+
+background_drainer = BackgroundDrainer()
+
+
+def enqueue_products(product_ids):
+    """
+    Add the given products to the indexing queue. Unless disabled by setting
+    ``SHOP_SEARCH_INDEX_QUEUE['autodrain']``, the queue is drained by a background thread after
+    the current transaction has been committed.
+    """
+    ProductIndexTask.objects.enqueue(product_ids)
+    if app_settings.SEARCH_INDEX_QUEUE['autodrain']:
+        transaction.on_commit(background_drainer.wake)
+
+
+def create_versioned_indices(version):
+    """
+    Create a new index for each document used to index products. The name of each new index is
+    the name of the document's index, suffixed by ``version``.
+
+    :returns: A dict mapping the name of each document's index onto its versioned index.
+    """
+    index_names = {}
+    for document_class in set(get_product_documents().values()):
+        alias = document_class._index._name
+        versioned_index = document_class._index.clone(name='{}-{}'.format(alias, version))
+        versioned_index.create()
+        index_names[alias] = versioned_index._name
+    return index_names
+
+
+def index_product_range(index_names, first_pk, last_pk):
+    """
+    Index all active products with a primary key between ``first_pk`` and ``last_pk`` into the
+    versioned indices created by :func:`create_versioned_indices`. This function is run by the
+    worker processes of ``./manage.py shop reindex``.
+
+    :returns: The number of indexed products.
+    """
+    from elasticsearch.helpers import bulk
+
+    queryset = ProductModel.objects.indexable().filter(pk__gte=first_pk, pk__lte=last_pk)
+    products = sorted(queryset, key=lambda product: (product.__class__.__name__, product.pk))
+    variants = {}
+    for product_class, group in groupby(products, key=lambda product: product.__class__):
+        variants.update(product_class.get_product_variants_in_bulk(list(group)))
+    for document_class in set(get_product_documents().values()):
+        document = document_class()
+        document._product_variants = variants
+        index_name = index_names[document._index._name]
+        with translation.override(document._language):
+            actions = [{
+                '_op_type': 'index',
+                '_index': index_name,
+                '_id': product.pk,
+                '_source': document.prepare(product),
+            } for product in products]
+        bulk(document._get_connection(), actions)
+    return len(products)
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _index_product_range(args):
+    return index_product_range(*args)
+
+
+def rebuild_indices(processes=None, shard_size=1000):
+    """
+    Rebuild the search indices for all products without downtime. The products are split into
+    shards of ``shard_size`` products, which are indexed into new versioned indices by a pool of
+    worker processes. Afterwards the index names used by the documents are turned into aliases
+    pointing onto the new indices, and the previous indices are deleted.
+
+    :returns: A generator yielding the number of products indexed by each shard.
+    """
+    from multiprocessing import get_context
+
+    started_at = timezone.now()
+    index_names = create_versioned_indices(started_at.strftime('%Y%m%d%H%M%S'))
+    product_ids = list(ProductModel.objects.indexable().order_by('pk').values_list('pk', flat=True))
+    shards = [
+        (index_names, product_ids[k], product_ids[min(k + shard_size, len(product_ids)) - 1])
+        for k in range(0, len(product_ids), shard_size)
+    ]
+    with get_context('spawn').Pool(processes, initializer=_init_worker) as pool:
+        yield from pool.imap_unordered(_index_product_range, shards)
+
+    for document_class in set(get_product_documents().values()):
+        swap_index_alias(document_class, index_names[document_class._index._name])
+
+    # products modified while rebuilding may be missing in the new indices
+    modified_ids = ProductModel.objects.filter(updated_at__gte=started_at).values_list('pk', flat=True)
+    ProductIndexTask.objects.enqueue(modified_ids)
+    drain_index_queue()
+
+
+def swap_index_alias(document_class, index_name):
+    """
+    Point the alias named after the document's index onto ``index_name`` and delete the indices
+    it pointed to before. An existing concrete index with the name of that alias, for instance
+    created by ``./manage.py search_index --rebuild``, is replaced.
+    """
+    es = document_class._get_connection()
+    alias = document_class._index._name
+    actions = [{'add': {'index': index_name, 'alias': alias}}]
+    if es.indices.exists_alias(name=alias):
+        previous_indices = [name for name in es.indices.get_alias(name=alias).keys() if name != index_name]
+        actions.extend({'remove': {'index': name, 'alias': alias}} for name in previous_indices)
+    else:
+        previous_indices = []
+        if es.indices.exists(index=alias):
+            # the concrete index is deleted within the same atomic operation adding the alias
+            actions.append({'remove_index': {'index': alias}})
+    es.indices.update_aliases(body={'actions': actions})
+    for name in previous_indices:
+        es.indices.delete(index=name)
@@ -1,17 +1,83 @@
+from django.core.cache import cache
 from django.utils.translation import get_language_from_request
 
-from django_elasticsearch_dsl.registries import registry
+from rest_framework import serializers
 
+from shop.conf import app_settings
 from shop.models.product import ProductModel
+from shop.search.backends import get_search_backend
+from shop.search.base import get_version_cache_key
+
+
+class SearchResultListSerializer(serializers.ListSerializer):
+    """
+    Fetch the current versions of all products found on the page of search results using one
+    cache request, rather than one per product.
+    """
+    def to_representation(self, data):
+        documents = list(data)
+        cache_keys = {get_version_cache_key(document.meta.id): document for document in documents}
+        self.outdated_ids = {
+            cache_keys[key].meta.id for key, version in cache.get_many(list(cache_keys)).items()
+            if version != getattr(cache_keys[key], 'updated_at', None)
+        }
+        return super().to_representation(documents)
+
+
+class SearchResultSerializer(serializers.BaseSerializer):
+    """
+    Serialize a search result straight from the product summary stored inside its indexed
+    document. Stale documents, indexed before that summary changed its structure or before their
+    product was modified, are serialized from the database instead.
+    """
+    class Meta:
+        list_serializer_class = SearchResultListSerializer
+
+    def is_outdated(self, document):
+        try:
+            return document.meta.id in self.parent.outdated_ids
+        except AttributeError:
+            version = cache.get(get_version_cache_key(document.meta.id))
+            return version is not None and version != getattr(document, 'updated_at', None)
+
+    def to_representation(self, document):
+        if not document.is_stale() and not self.is_outdated(document):
+            return document.summary.to_dict()
+        product = ProductModel.objects.get(pk=document.meta.id)
+        serializer_class = app_settings.PRODUCT_SUMMARY_SERIALIZER
+        return serializer_class(product, context=self.context, label=self.label or 'search').data
 
 
 class SearchViewMixin:
+    """
+    :param results_from_source: If ``True``, search results are serialized from the product
+        summaries stored inside the indexed documents, without querying the database.
+        Defaults to ``False``.
+    """
+    results_from_source = False
+
     def get_document(self, language):
-        documents = registry.get_documents([ProductModel])
-        try:
-            return next(doc for doc in documents if doc._language == language)
-        except StopIteration:
-            return next(doc for doc in documents if doc._language is None)
+        return get_search_backend().get_document(language)
+
+    def get_search_results(self, search):
+        """
+        Return the results of the given search, either as a queryset of products, or when serving
+        them from the source, as the search object itself, which then is sliced by the paginator.
+        """
+        if self.results_from_source:
+            return search
+        return search.to_queryset()
+
+    def is_search_request(self):
+        """
+        Return ``True``, if the current request is answered by the search backend.
+        """
+        return True
+
+    def get_serializer_class(self):
+        if self.results_from_source and self.is_search_request():
+            return SearchResultSerializer
+        return super().get_serializer_class()
 
 
 class ProductSearchViewMixin(SearchViewMixin):
@@ -27,6 +93,9 @@ class ProductSearchViewMixin(SearchViewMixin):
             renderer_context['search_autocomplete'] = True
         return renderer_context
 
+    def is_search_request(self):
+        return bool(self.request.GET.get('q'))
+
     def get_queryset(self):
         query = self.request.GET.get('q')
         if query:
@@ -34,7 +103,7 @@ class ProductSearchViewMixin(SearchViewMixin):
             document = self.get_document(language)
             search = document.search().source(excludes=['body'])
             search = search.query('multi_match', query=query, fields=self.search_fields, type='bool_prefix')
-            queryset = search.to_queryset()
+            queryset = self.get_search_results(search)
         else:
             queryset = super().get_queryset()
         return queryset
@@ -57,4 +126,4 @@ class CatalogSearchViewMixin(SearchViewMixin):
         search = document.search().source(excludes=['body'])
         if query:
             search = search.query('multi_match', query=query, fields=self.search_fields)
-        return search.to_queryset()
+        return self.get_search_results(search)
@@ -1,12 +1,11 @@
 from django.conf import settings
 from django.template.loader import select_template
-from django.urls import NoReverseMatch, reverse
 from django.utils.translation import get_language_from_request
-from cms.models.pagemodel import Page
 from rest_framework.serializers import CharField, BooleanField
 from rest_auth import serializers
 from shop.conf import app_settings
 from shop.forms.auth import PasswordResetRequestForm
+from shop.pages import get_page_url
 from rest_auth.serializers import LoginSerializer as DefaultLoginSerializer
 
 
@@ -31,16 +30,9 @@ class PasswordResetRequestSerializer(serializers.PasswordResetSerializer):
             '{}/email/password-reset-body.html'.format(app_settings.APP_LABEL),
             'shop/email/password-reset-body.html',
         ])
-        try:
-            page = Page.objects.select_related('node').get(reverse_id='password-reset-confirm', publisher_is_draft=False)
-        except Page.DoesNotExist:
-            try:
-                password_reset_confirm_url = reverse('password-reset-confirm')
-            except NoReverseMatch:
-                password_reset_confirm_url = self.invalid_password_reset_confirm_url
-        else:
-            language = get_language_from_request(self.context['request'])
-            password_reset_confirm_url = page.get_absolute_url(language)
+        language = get_language_from_request(self.context['request'])
+        password_reset_confirm_url = get_page_url('password-reset-confirm', language) \
+            or self.invalid_password_reset_confirm_url
         opts = {
             'use_https': self.context['request'].is_secure(),
             'from_email': getattr(settings, 'DEFAULT_FROM_EMAIL'),
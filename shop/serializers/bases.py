@@ -1,5 +1,6 @@
 from django.core import exceptions
 from django.core.cache import cache
+from django.db import models
 from django.template import TemplateDoesNotExist
 from django.template.loader import select_template
 from django.utils.html import strip_spaces_between_tags
@@ -11,6 +12,7 @@ from shop.conf import app_settings
 from shop.models.customer import CustomerModel
 from shop.models.product import ProductModel
 from shop.models.order import OrderItemModel
+from shop.money import AbstractMoney
 from shop.rest.money import MoneyField
 
 
@@ -30,6 +32,17 @@ class AvailabilitySerializer(serializers.Serializer):
     limited_offer = serializers.BooleanField()
 
 
+class ProductListSerializer(serializers.ListSerializer):
+    """
+    Serializes many products in one pass. The HTML snippets rendered for these products are
+    fetched from the cache using one request per kind of snippet, rather than one per product.
+    """
+    def to_representation(self, data):
+        products = list(data.all() if isinstance(data, models.Manager) else data)
+        self.child.batch = products
+        return super().to_representation(products)
+
+
 class ProductSerializer(serializers.ModelSerializer):
     """
     Common serializer for our product model.
@@ -37,20 +50,30 @@ class ProductSerializer(serializers.ModelSerializer):
     price = serializers.SerializerMethodField()
     product_type = serializers.CharField(read_only=True)
     product_model = serializers.CharField(read_only=True)
-    product_url = serializers.URLField(source='get_absolute_url', read_only=True)
+    product_url = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductModel
         fields = '__all__'
+        list_serializer_class = ProductListSerializer
 
     def __init__(self, *args, **kwargs):
         kwargs.setdefault('label', 'catalog')
         super().__init__(*args, **kwargs)
+        self.batch = []  # products serialized together with the current one
+        self._html_snippets = {}
 
     def get_price(self, product):
         price = product.get_price(self.context['request'])
         return '{:f}'.format(price)
 
+    def get_product_url(self, product):
+        # the view may have resolved the URLs of all products in bulk
+        try:
+            return self.context['product_urls'][product.pk]
+        except KeyError:
+            return product.get_absolute_url()
+
     def render_html(self, product, postfix):
         """
         Return a HTML snippet containing a rendered summary for the given product.
@@ -64,9 +87,8 @@ class ProductSerializer(serializers.ModelSerializer):
             raise exceptions.ImproperlyConfigured(msg)
         app_label = product._meta.app_label.lower()
         request = self.context['request']
-        cache_key = 'product:{0}|{1}-{2}-{3}-{4}-{5}'.format(product.id, app_label, self.label,
-            product.product_model, postfix, get_language_from_request(request))
-        content = cache.get(cache_key)
+        cache_key = self.get_html_cache_key(product, postfix)
+        content = self.get_cached_html(cache_key, postfix)
         if content:
             return mark_safe(content)
         params = [
@@ -87,11 +109,49 @@ class ProductSerializer(serializers.ModelSerializer):
         cache.set(cache_key, content, app_settings.CACHE_DURATIONS['product_html_snippet'])
         return mark_safe(content)
 
+    def get_html_cache_key(self, product, postfix):
+        return 'product:{0}|{1}-{2}-{3}-{4}-{5}'.format(product.id, product._meta.app_label.lower(),
+            self.label, product.product_model, postfix, get_language_from_request(self.context['request']))
+
+    def get_cached_html(self, cache_key, postfix):
+        """
+        Return the cached HTML snippet for ``cache_key``. While serializing a batch of products,
+        the snippets of all products in that batch are fetched at once.
+        """
+        if self.batch and postfix not in self._html_snippets:
+            keys = [self.get_html_cache_key(product, postfix) for product in self.batch]
+            cached = cache.get_many(keys)
+            self._html_snippets[postfix] = {key: cached.get(key) for key in keys}
+        snippets = self._html_snippets.get(postfix, {})
+        if cache_key in snippets:
+            return snippets[cache_key]
+        return cache.get(cache_key)
+
+
+class OrderExtraField(serializers.Field):
+    """
+    Serializes the ``extra`` dictionary of an order or order item, with its extra rows
+    reconstructed from their compact representation.
+    """
+    def __init__(self, **kwargs):
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        money_field = MoneyField()
+        rows = [
+            (modifier, dict(row, amount=money_field.to_representation(row['amount'])))
+            if isinstance(row.get('amount'), AbstractMoney) else (modifier, row)
+            for modifier, row in obj.extra_rows
+        ]
+        return dict(obj.extra, rows=rows)
+
 
 class BaseOrderItemSerializer(serializers.ModelSerializer):
     line_total = MoneyField()
     unit_price = MoneyField()
     product_code = serializers.CharField()
+    extra = OrderExtraField()
 
     class Meta:
         model = OrderItemModel
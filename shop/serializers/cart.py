@@ -1,3 +1,5 @@
+from django.db import models
+from django.utils.functional import SimpleLazyObject, cached_property
 from rest_framework import serializers
 from shop.conf import app_settings
 from shop.models.cart import CartModel, CartItemModel
@@ -5,19 +7,35 @@ from shop.rest.money import MoneyField
 from shop.models.fields import ChoiceEnum
 
 
-class ExtraCartRow(serializers.Serializer):
+class ExtraCartRow:
     """
     This data structure holds extra information for each item, or for the whole cart, while
     processing the cart using their modifiers.
+
+    :param label: A short description of this row in a natural language.
+    :param amount: The price difference, if applied.
+
+    For compatibility with modifiers written for the previous serializer based implementation,
+    the label and amount may also be passed as a dictionary, as in ``ExtraCartRow(instance)``.
     """
-    label = serializers.CharField(
-        read_only=True,
-        help_text="A short description of this row in a natural language.",
-    )
+    __slots__ = ['label', 'amount']
+
+    def __init__(self, instance=None, label=None, amount=None):
+        if instance is not None:
+            label, amount = instance.get('label', label), instance.get('amount', amount)
+        self.label = label
+        self.amount = amount
 
-    amount = MoneyField(
-        help_text="The price difference, if applied.",
-    )
+    def to_dict(self):
+        return {
+            'label': None if self.label is None else str(self.label),
+            'amount': None if self.amount is None else '{:f}'.format(self.amount),
+        }
+
+    @property
+    def data(self):
+        # kept for modifiers accessing the row as serializer
+        return self.to_dict()
 
 
 class ExtraCartRowList(serializers.Serializer):
@@ -26,7 +44,21 @@ class ExtraCartRowList(serializers.Serializer):
     Additionally add the modifiers identifier to each element.
     """
     def to_representation(self, obj):
-        return [dict(ecr.data, modifier=modifier) for modifier, ecr in obj.items()]
+        return [dict(ecr.to_dict(), modifier=modifier) for modifier, ecr in obj.items()]
+
+
+class ItemListSerializer(serializers.ListSerializer):
+    """
+    Serializes many cart items in one pass. The summaries of their products are serialized
+    together, so that their HTML snippets are fetched from the cache in one request.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.Manager) else data)
+        serializer_class = app_settings.PRODUCT_SUMMARY_SERIALIZER
+        serializer = serializer_class([item.product for item in items], context=self.context,
+                                      read_only=True, label=self.root.label, many=True)
+        self.child.summaries = {item.pk: summary for item, summary in zip(items, serializer.data)}
+        return super().to_representation(items)
 
 
 class BaseItemSerializer(serializers.ModelSerializer):
@@ -39,6 +71,11 @@ class BaseItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CartItemModel
+        list_serializer_class = ItemListSerializer
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.summaries = {}
 
     def create(self, validated_data):
         assert 'cart' in validated_data
@@ -47,6 +84,7 @@ class BaseItemSerializer(serializers.ModelSerializer):
         return cart_item
 
     def to_representation(self, cart_item):
+        # items taken from an updated cart are not updated again
         cart_item.update(self.context['request'])
         representation = super().to_representation(cart_item)
         return representation
@@ -58,6 +96,8 @@ class BaseItemSerializer(serializers.ModelSerializer):
         return product
 
     def get_summary(self, cart_item):
+        if cart_item.pk in self.summaries:
+            return self.summaries[cart_item.pk]
         serializer_class = app_settings.PRODUCT_SUMMARY_SERIALIZER
         serializer = serializer_class(cart_item.product, context=self.context,
                                       read_only=True, label=self.root.label)
@@ -98,10 +138,15 @@ class BaseCartSerializer(serializers.ModelSerializer):
         model = CartModel
         fields = ['subtotal', 'total', 'extra_rows']
 
+    def __init__(self, *args, **kwargs):
+        # in lean mode, items are taken from the updated cart, rather than fetched and updated again
+        self.lean = kwargs.pop('lean', False)
+        super().__init__(*args, **kwargs)
+
     def to_representation(self, cart):
         cart.update(self.context['request'])
         representation = super().to_representation(cart)
-        if self.with_items:
+        if self.with_items not in (False, CartItems.without):
             items = self.represent_items(cart)
             representation.update(items=items)
         return representation
@@ -122,7 +167,11 @@ class CartSerializer(BaseCartSerializer):
         super().__init__(*args, **kwargs)
 
     def represent_items(self, cart):
-        if self.with_items == CartItems.unsorted:
+        if self.lean:
+            items = list(cart._cached_cart_items or [])
+            if self.with_items == CartItems.unsorted:
+                items.sort(key=lambda item: item.updated_at, reverse=True)
+        elif self.with_items == CartItems.unsorted:
             items = CartItemModel.objects.filter(cart=cart, quantity__gt=0).order_by('-updated_at')
         else:
             items = CartItemModel.objects.filter_cart_items(cart, self.context['request'])
@@ -147,3 +196,74 @@ class WatchSerializer(BaseCartSerializer):
             items = CartItemModel.objects.filter_watch_items(cart, self.context['request'])
         serializer = WatchItemSerializer(items, context=self.context, label=self.label, many=True)
         return serializer.data
+
+
+class CartSummary:
+    """
+    The serialized cart of the current customer, shared by everything rendering the cart during
+    one request, such as the template renderer, the cart icon and the cart and checkout plugins.
+    The cart is fetched and updated at most once, and each of its representations is serialized
+    at most once. Use :func:`get_cart_summary` to access the summary of a request.
+    """
+    def __init__(self, request):
+        self.request = request
+        self._representations = {}
+
+    @cached_property
+    def cart(self):
+        try:
+            return CartModel.objects.get_from_request(self.request)
+        except CartModel.DoesNotExist:
+            return None
+
+    @cached_property
+    def is_filled(self):
+        return self.cart is not None and self.cart.items.exists()
+
+    def get_data(self, label='cart', with_items=CartItems.without):
+        """
+        Return the serialized cart, or ``None`` if the customer has no cart. The representation
+        without items does not depend on the label, hence it is shared.
+        """
+        if self.cart is None:
+            return None
+        if with_items in (False, None, CartItems.without):
+            key = (None, CartItems.without)
+        else:
+            key = (label, CartItems.unsorted if with_items == CartItems.unsorted else CartItems.arranged)
+        if key not in self._representations:
+            if key[1] is CartItems.without and self._representations:
+                data = next(iter(self._representations.values()))
+                self._representations[key] = {k: v for k, v in data.items() if k != 'items'}
+            else:
+                serializer = CartSerializer(self.cart, context={'request': self.request}, label=label,
+                                            with_items=key[1], lean=True)
+                self._representations[key] = serializer.data
+        return self._representations[key]
+
+    def lazy_data(self, label='cart', with_items=CartItems.without):
+        """
+        Return the serialized cart as a lazy object, evaluated when a template accesses it.
+        """
+        return SimpleLazyObject(lambda: self.get_data(label=label, with_items=with_items))
+
+    def lazy_is_filled(self):
+        return SimpleLazyObject(lambda: self.is_filled)
+
+    def invalidate(self):
+        """
+        Discard the representations serialized so far, after the cart has been modified.
+        """
+        self._representations.clear()
+
+
+def get_cart_summary(request):
+    """
+    Return the :class:`CartSummary` of the given request, creating it on first access.
+    """
+    request = getattr(request, '_request', request)  # unwrap the request of the REST framework
+    try:
+        return request._cart_summary
+    except AttributeError:
+        request._cart_summary = CartSummary(request)
+        return request._cart_summary
@@ -1,21 +1,22 @@
 from rest_framework import serializers
-from shop.models.product import ProductModel
 
 
-class ProductSelectSerializer(serializers.ModelSerializer):
+class ProductSelectSerializer(serializers.Serializer):
     """
     A simple serializer to convert the product's name and code used for rendering the
     `Select2 Widget`_'s content, while looking up for a certain product.
     This serializer shall return a list of 2-tuples, whose 1st entry is the
     primary key of the product and the second entry is the rendered name.
 
+    It accepts the rows as fetched by :class:`shop.views.catalog.ProductSelectView` using
+    ``values('id', 'text')``, as well as product instances.
+
     .. _Select2 Widget: https://github.com/applegrew/django-select2
     """
+    id = serializers.IntegerField(read_only=True)
     text = serializers.SerializerMethodField()
 
-    class Meta:
-        model = ProductModel
-        fields = ['id', 'text']
-
     def get_text(self, instance):
+        if isinstance(instance, dict):
+            return instance['text']
         return instance.product_name
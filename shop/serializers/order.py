@@ -1,10 +1,13 @@
+from django.db import connections
 from django.utils import timezone
 from rest_framework import serializers
 from shop.conf import app_settings
 from shop.models.cart import CartModel
+from shop.models.fields import JSONSet
 from shop.models.order import OrderModel
 from shop.modifiers.pool import cart_modifiers_pool
 from shop.rest.money import MoneyField
+from shop.serializers.bases import OrderExtraField
 
 
 class OrderListSerializer(serializers.ModelSerializer):
@@ -40,7 +43,7 @@ class OrderListSerializer(serializers.ModelSerializer):
 
 class OrderDetailSerializer(OrderListSerializer):
 
-    extra = serializers.DictField(read_only=True)
+    extra = OrderExtraField()
     amount_paid = MoneyField(read_only=True)
     outstanding_amount = MoneyField(read_only=True)
     can_be_canceled = serializers.BooleanField(read_only=True)
@@ -71,7 +74,7 @@ class OrderDetailSerializer(OrderListSerializer):
 
     class Meta:
         model = OrderModel
-        exclude = ['id', 'customer', 'stored_request', '_subtotal', '_total']
+        exclude = ['id', 'customer', 'stored_request', '_subtotal', '_total', '_amount_paid']
         read_only_fields = ['shipping_address_text', 'billing_address_text']  # TODO: not part of OrderBase
 
     def get_partially_paid(self, order):
@@ -92,7 +95,14 @@ class OrderDetailSerializer(OrderListSerializer):
         if validated_data.get('annotation'):
             timestamp = timezone.now().isoformat()
             order.extra['addendum'].append((timestamp, validated_data['annotation']))
-            order.save()
+            # write only the addendum, instead of the whole dictionary containing the extra rows
+            order.updated_at = timezone.now()
+            queryset = OrderModel.objects.filter(pk=order.pk)
+            if JSONSet.is_supported(connections[queryset.db]):
+                extra = JSONSet('extra', addendum=order.extra['addendum'])
+            else:
+                extra = order.extra
+            queryset.update(extra=extra, updated_at=order.updated_at)
         if validated_data['reorder'] is True:
             cart = CartModel.objects.get_from_request(self.context['request'])
             order.readd_to_cart(cart)
@@ -1,10 +1,11 @@
 from django.conf import settings
+from django.db import transaction
 from django.db.models import Sum
 from django.utils import timezone
-from django.utils.functional import cached_property
 from django.utils.translation import get_language, gettext_lazy as _
-from django_fsm import transition
+from django_fsm import can_proceed, transition
 from shop.models.delivery import DeliveryModel, DeliveryItemModel
+from shop.models.order import OrderItemModel
 
 from post_office import mail
 from post_office.models import EmailTemplate
@@ -157,9 +158,9 @@ class CommissionGoodsWorkflowMixin(SimpleShippingWorkflowMixin):
     def ship_order(self, by=None):
         """Order was picked up by shipping service provider (method auto invoked)."""
 
-    def update_or_create_delivery(self, orderitem_data):
+    def get_or_create_open_delivery(self):
         """
-        Update or create a Delivery object for all items of this Order object.
+        Return the Delivery object of this Order, which has not been shipped yet.
         """
         delivery, _ = DeliveryModel.objects.get_or_create(
             order=self,
@@ -168,12 +169,86 @@ class CommissionGoodsWorkflowMixin(SimpleShippingWorkflowMixin):
             shipping_method=self.extra.get('shipping_modifier'),
             defaults={'fulfilled_at': timezone.now()}
         )
-        for item in self.items.all():
-            DeliveryItemModel.objects.create(
-                delivery=delivery,
-                item=item,
-                quantity=item.quantity,
-            )
+        return delivery
+
+    def ready_for_fulfillment(self):
+        """
+        :returns: ``True`` if the goods of this Order may be commissioned, ie. if it is in a state
+        accepted by the transition picking the goods.
+        """
+        return can_proceed(self.goods_picked)
+
+    def update_or_create_delivery(self, orderitem_data):
+        """
+        Update or create a Delivery object for all items of this Order object.
+        """
+        delivery = self.get_or_create_open_delivery()
+        DeliveryItemModel.objects.bulk_create([
+            DeliveryItemModel(delivery=delivery, item=item, quantity=item.quantity)
+            for item in self.items.all()
+        ])
+        self.__dict__.pop('_unfulfilled_items', None)
+
+    @classmethod
+    @transaction.atomic
+    def fulfill_orders(cls, orders):
+        """
+        Commission all remaining items of the given orders, ie. those which neither have been
+        canceled nor delivered yet. For each order, they are added to its Delivery object not
+        shipped yet, which is created if missing. Orders which are not ready for fulfillment or
+        without remaining items are skipped.
+
+        All orders are handled in one transaction using a fixed number of queries, hence use this
+        method to fulfill a batch of orders at once.
+
+        :returns: A list of Delivery objects, one for each fulfilled order.
+        """
+        orders = {order.pk: order for order in orders if order.ready_for_fulfillment()}
+        if not orders:
+            return []
+        order_items = OrderItemModel.objects.filter(order__in=orders.keys(), canceled=False).annotate(
+            delivered_quantity=Sum('deliver_item__quantity'),
+        ).order_by('order', 'pk')
+        remaining = {}
+        for item in order_items:
+            quantity = item.quantity - (item.delivered_quantity or 0)
+            if quantity > 0:
+                remaining.setdefault(item.order_id, []).append((item, quantity))
+        if not remaining:
+            return []
+
+        def get_open_deliveries():
+            deliveries = DeliveryModel.objects.filter(
+                order__in=remaining.keys(),
+                shipping_id__isnull=True,
+                shipped_at__isnull=True,
+            ).order_by('pk')
+            return {(d.order_id, d.shipping_method): d for d in deliveries}
+
+        def get_key(order_pk):
+            return order_pk, orders[order_pk].extra.get('shipping_modifier')
+
+        deliveries = get_open_deliveries()
+        fulfilled_at = timezone.now()
+        missing = [pk for pk in remaining.keys() if get_key(pk) not in deliveries]
+        if missing:
+            numbers = DeliveryModel.allocate_numbers(missing)
+            missing = [DeliveryModel(
+                order=orders[pk],
+                shipping_method=get_key(pk)[1],
+                fulfilled_at=fulfilled_at,
+                number=numbers[pk],
+            ) for pk in missing]
+            DeliveryModel.objects.bulk_create(missing)
+            # not all database backends return the primary keys of bulk created objects
+            deliveries = get_open_deliveries()
+        DeliveryItemModel.objects.bulk_create([
+            DeliveryItemModel(delivery=deliveries[get_key(order_pk)], item=item, quantity=quantity)
+            for order_pk, items in remaining.items() for item, quantity in items
+        ])
+        for order_pk in remaining.keys():
+            orders[order_pk].__dict__.pop('_unfulfilled_items', None)
+        return [deliveries[get_key(order_pk)] for order_pk in remaining.keys()]
 
 
 class PartialDeliveryWorkflowMixin(CommissionGoodsWorkflowMixin):
@@ -197,18 +272,31 @@ class PartialDeliveryWorkflowMixin(CommissionGoodsWorkflowMixin):
     def allow_partial_delivery(self):
         return True
 
-    @cached_property
+    @property
     def unfulfilled_items(self):
-        unfulfilled_items = 0
-        for order_item in self.items.all():
-            if not order_item.canceled:
-                aggr = order_item.deliver_item.aggregate(delivered=Sum('quantity'))
-                unfulfilled_items += order_item.quantity - (aggr['delivered'] or 0)
-        return unfulfilled_items
+        """
+        The quantity of ordered items which neither have been canceled nor delivered yet. Orders
+        fetched using ``OrderModel.objects.with_unfulfilled_items()`` already carry this value,
+        until one of their deliveries is changed.
+        """
+        try:
+            return self.__dict__['_unfulfilled_items']
+        except KeyError:
+            queryset = self.__class__.objects.filter(pk=self.pk).with_unfulfilled_items()
+            return queryset.values_list('unfulfilled_items', flat=True).get()
+
+    @unfulfilled_items.setter
+    def unfulfilled_items(self, value):
+        # assigned by the annotation of ``with_unfulfilled_items()``
+        self.__dict__['_unfulfilled_items'] = value
 
     def ready_for_picking(self):
         return self.is_fully_paid() and self.unfulfilled_items > 0
 
+    def ready_for_fulfillment(self):
+        # the remaining items are determined by fulfill_orders() for all orders at once
+        return self.amount_paid >= self.total
+
     def ready_for_shipping(self):
         return self.delivery_set.filter(shipped_at__isnull=True).exists()
 
@@ -236,22 +324,17 @@ class PartialDeliveryWorkflowMixin(CommissionGoodsWorkflowMixin):
         """
         Update or create a Delivery object and associate with selected ordered items.
         """
-        delivery, _ = DeliveryModel.objects.get_or_create(
-            order=self,
-            shipping_id__isnull=True,
-            shipped_at__isnull=True,
-            shipping_method=self.extra.get('shipping_modifier'),
-            defaults={'fulfilled_at': timezone.now()}
-        )
+        delivery_items = [
+            DeliveryItemModel(item=data['id'], quantity=data['deliver_quantity'])
+            for data in orderitem_data if data['deliver_quantity'] > 0 and not data['canceled']
+        ]
+        if not delivery_items:
+            # since no OrderItem would be added to a delivery, do not create one
+            return
 
         # create a DeliveryItem object for each ordered item to be shipped with this delivery
-        for data in orderitem_data:
-            if data['deliver_quantity'] > 0 and not data['canceled']:
-                DeliveryItemModel.objects.create(
-                    delivery=delivery,
-                    item=data['id'],
-                    quantity=data['deliver_quantity'],
-                )
-        if not delivery.items.exists():
-            # since no OrderItem was added to this delivery, discard it
-            delivery.delete()
+        delivery = self.get_or_create_open_delivery()
+        for delivery_item in delivery_items:
+            delivery_item.delivery = delivery
+        DeliveryItemModel.objects.bulk_create(delivery_items)
+        self.__dict__.pop('_unfulfilled_items', None)
@@ -1,25 +1,15 @@
-try:
-    import redis
-except ImportError:
-    redis = None
-from django.conf import settings
 from django.dispatch import Signal
 
+from shop import events
 
-customer_recognized = Signal(providing_args=['customer', 'request'])
 
-if redis and hasattr(settings, 'SESSION_REDIS'):
-    redis_con = dict((key, settings.SESSION_REDIS[key]) for key in ['host', 'port', 'db', 'socket_timeout'])
-    pool = redis.ConnectionPool(**redis_con)
-    redis_con = redis.Redis(connection_pool=pool)
-else:
-    redis_con = type(str('Redis'), (), {'publish': lambda *args: None})()
+customer_recognized = Signal(providing_args=['customer', 'request'])
 
 
 def email_queued():
     """
-    If SESSION_REDIS is configured, inform a separately running worker engine, that
-    emails are ready for delivery. Call this function every time an email has been
-    handled over to the Post-Office.
+    Inform a separately running worker engine, that emails are ready for delivery. Call this
+    function every time an email has been handled over to the Post-Office. Inside a transaction,
+    the worker engine is informed only once, after that transaction has been committed.
     """
-    redis_con.publish('django-SHOP', 'send_queued_mail')
+    events.emit(events.EMAIL_QUEUED)
@@ -10,8 +10,8 @@ from django.utils.safestring import mark_safe
 from django.utils.dateformat import format, time_format
 from django.utils.timezone import datetime
 from shop.conf import app_settings
-from shop.models.cart import CartModel
-from shop.serializers.cart import CartSerializer, CartItems
+from shop.pages import get_page_url
+from shop.serializers.cart import CartItems, get_cart_summary
 from shop.rest.money import JSONRenderer
 
 register = template.Library()
@@ -31,12 +31,10 @@ class CartIcon(Node):
         ]).template
 
     def render(self, context):
-        try:
-            cart = CartModel.objects.get_from_request(context['request'])
-            serializer = CartSerializer(instance=cart, context=context, label='dropdown', with_items=self.with_items)
-            cart_data = JSONRenderer().render(serializer.data)
-        except CartModel.DoesNotExist:
+        cart_data = get_cart_summary(context['request']).get_data(label='dropdown', with_items=self.with_items)
+        if cart_data is None:
             cart_data = {'total_quantity': 0, 'num_items': 0}
+        cart_data = JSONRenderer().render(cart_data)
         context.update({
             'cart_as_json': mark_safe(force_str(cart_data)),
             'has_dropdown': self.with_items != CartItems.without,
@@ -44,6 +42,16 @@ class CartIcon(Node):
         return self.get_template().render(context)
 
 
+@register.simple_tag
+def shop_page_url(reverse_id):
+    """
+    Return the URL of the CMS page with the given ``reverse_id`` in the current language, falling
+    back to the URL with that name. As with ``{% page_url %}``, an empty string is returned, if
+    there is no such page. Unlike ``{% page_url %}``, the URL is cached.
+    """
+    return get_page_url(reverse_id)
+
+
 @register.tag
 def cart_icon(parser, token):
     def raise_syntax_error():
@@ -1,16 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urlparse
 
 from django.contrib.auth.models import AnonymousUser
-from django.db import models
+from django.db import connection, transaction
 from django.http.request import HttpRequest
 from post_office import mail
-from post_office.models import EmailTemplate
 from shop.conf import app_settings
-from shop.models.order import BaseOrder
-from shop.models.notification import Notification
+from shop.models.order import BaseOrder, OrderModel
+from shop.models.notification import notification_rules
 from shop.serializers.delivery import DeliverySerializer
+from shop import events
 from shop.signals import email_queued
 
+import logging
+logger = logging.getLogger('shop')
+
 
 class EmulateHttpRequest(HttpRequest):
     """
@@ -36,16 +41,14 @@ class EmulateHttpRequest(HttpRequest):
         self.current_page = None
 
 
-def transition_change_notification(order):
+def send_notifications(order, transition_target):
     """
-    This function shall be called, after an Order object performed a transition change.
-
+    Render the emails notifying about the transition of the given order to ``transition_target``
+    and hand them over to the Post-Office.
     """
-    if not isinstance(order, BaseOrder):
-        raise TypeError("Object order must inherit from class BaseOrder")
     emails_in_queue = False
-    for notification in Notification.objects.filter(transition_target=order.status):
-        recipient = notification.get_recipient(order)
+    for rule in notification_rules.get_rules(transition_target):
+        recipient = rule.get_recipient(order)
         if recipient is None:
             continue
 
@@ -58,14 +61,51 @@ def transition_change_notification(order):
             'order': order,
             'render_language': language,
         }
+        template = rule.get_mail_template(language)
+        attachments = rule.open_attachments()
         try:
-            template = notification.mail_template.translated_templates.get(language=language)
-        except EmailTemplate.DoesNotExist:
-            template = notification.mail_template
-        attachments = {}
-        for notiatt in notification.notificationattachment_set.all():
-            attachments[notiatt.attachment.original_filename] = notiatt.attachment.file.file
-        mail.send(recipient, template=template, context=context, attachments=attachments)
+            mail.send(recipient, template=template, context=context, attachments=attachments)
+        finally:
+            for attachment in attachments.values():
+                attachment['file'].close()
         emails_in_queue = True
     if emails_in_queue:
-        email_queued()
\ No newline at end of file
+        email_queued()
+
+
+def _send_notifications_in_background(order_pk, transition_target):
+    try:
+        order = OrderModel.objects.select_related('customer__user').get(pk=order_pk)
+        send_notifications(order, transition_target)
+    except Exception as exc:
+        logger.exception("Failed to notify about transition of order {} to '{}': {}".format(
+            order_pk, transition_target, exc))
+    finally:
+        connection.close()
+
+
+@lru_cache()
+def get_notification_executor():
+    return ThreadPoolExecutor(
+        max_workers=app_settings.NOTIFICATION_WORKERS,
+        thread_name_prefix='shop-notification',
+    )
+
+
+def transition_change_notification(order):
+    """
+    This function shall be called, after an Order object performed a transition change.
+
+    The emails notifying about that transition are prepared by a pool of background threads, after
+    the current transaction has been committed. This can be disabled using setting
+    ``SHOP_NOTIFICATION_WORKERS``.
+    """
+    if not isinstance(order, BaseOrder):
+        raise TypeError("Object order must inherit from class BaseOrder")
+    events.emit(events.ORDER_TRANSITIONED, order=order.pk, status=order.status)
+    if app_settings.NOTIFICATION_WORKERS:
+        # the order may perform further transitions before the notifications are sent
+        args = (order.pk, order.status)
+        transaction.on_commit(lambda: get_notification_executor().submit(_send_notifications_in_background, *args))
+    else:
+        send_notifications(order, order.status)
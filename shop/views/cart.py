@@ -96,7 +96,8 @@ class CartViewSet(BaseViewSet):
     def fetch_dropdown(self, request):
         cart = self.get_queryset()
         context = self.get_serializer_context()
-        serializer = self.serializer_class(cart, context=context, label='dropdown', with_items=CartItems.unsorted)
+        serializer = self.serializer_class(cart, context=context, label='dropdown', with_items=CartItems.unsorted,
+                                           lean=True)
         return Response(serializer.data)
 
 
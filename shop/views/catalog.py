@@ -132,12 +132,11 @@ class ProductListView(generics.ListAPIView):
         return response
 
     def get_queryset(self):
-        qs = self.product_model.objects.filter(self.limit_choices_to, active=True)
+        qs = self.product_model.objects.catalog().filter(self.limit_choices_to)
         # restrict queryset by language
         if hasattr(self.product_model, 'translations'):
             language = get_language_from_request(self.request)
-            qs = qs.prefetch_related('translations').filter(translations__language_code=language)
-        qs = qs.select_related('polymorphic_ctype')
+            qs = qs.filter(translations__language_code=language)
         return qs
 
 
@@ -321,25 +320,57 @@ class ProductRetrieveView(generics.RetrieveAPIView):
         return self._product
 
 
-class OnePageResultsSetPagination(pagination.PageNumberPagination):
-    def __init__(self):
-        self.page_size = ProductModel.objects.count()
+class SelectResultsPagination(pagination.BasePagination):
+    """
+    Paginate the results of the product select view in the format expected by the Select2 widget.
+    In order to avoid counting all matching products, only one more row than the page size is
+    fetched to determine whether there are more results.
+    """
+    page_size = 20
+    page_query_param = 'page'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        try:
+            page = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            page = 1
+        offset = (page - 1) * self.page_size
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.more = len(results) > self.page_size
+        return results[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({'results': data, 'more': self.more})
 
 
 class ProductSelectView(generics.ListAPIView):
     """
     A simple list view, which is used only by the admin backend. It is required to fetch
     the data for rendering the select widget when looking up for a product.
+
+    The products are looked up by their declared ``lookup_fields`` and returned as lightweight
+    rows containing their primary key and name, rather than as model instances.
     """
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
     serializer_class = app_settings.PRODUCT_SELECT_SERIALIZER
-    pagination_class = OnePageResultsSetPagination
+    pagination_class = SelectResultsPagination
+    min_term_length = 2
 
     def get_queryset(self):
         term = self.request.GET.get('term', '')
-        if len(term) >= 2:
-            return ProductModel.objects.select_lookup(term)
-        return ProductModel.objects.all()
+        text_path = ProductModel.get_field_path('product_name')
+        filters = {}
+        if text_path and text_path.startswith('translations__'):
+            # must share the join with the lookup of translated names
+            filters.update(translations__language_code=get_language_from_request(self.request))
+        if len(term) >= self.min_term_length:
+            queryset = ProductModel.objects.select_lookup(term, **filters)
+        else:
+            queryset = ProductModel.objects.filter(**filters)
+        if text_path is None:
+            # the product name is a property, hence rows can not be fetched using values()
+            return queryset.order_by('pk')
+        return queryset.values('id', text=models.F(text_path)).order_by(text_path, 'id')
 
 
 class AddFilterContextMixin:
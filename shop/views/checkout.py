@@ -39,7 +39,11 @@ class CheckoutViewSet(GenericViewSet):
                     product_name=exc.product.product_name, product_code=exc.product.product_code)
             response_data = {'purchasing_error_message': message}
             return Response(data=response_data, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
-        cart.save()
+        if cart.pk:
+            # changes of cart.extra have been written by cart.update()
+            cart.save(update_fields=['updated_at'])
+        else:
+            cart.save()
 
         response_data = {}
         try:
@@ -1,6 +1,9 @@
+from itertools import groupby
+
+from django.db.models import prefetch_related_objects
 from django.utils import timezone
 from django.views.decorators.cache import never_cache
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import get_language, gettext_lazy as _
 from rest_framework import generics, mixins
 from rest_framework.exceptions import NotFound, MethodNotAllowed
 from rest_framework.pagination import LimitOffsetPagination
@@ -11,6 +14,7 @@ from shop.conf import app_settings
 from shop.rest.money import JSONRenderer
 from shop.rest.renderers import CMSPageRenderer
 from shop.models.order import OrderModel
+from shop.models.product import ProductModel
 
 
 class OrderPagination(LimitOffsetPagination):
@@ -55,8 +59,48 @@ class OrderView(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateM
         queryset = OrderModel.objects.all()
         if not self.request.customer.is_visitor:
             queryset = queryset.filter(customer=self.request.customer).order_by('-updated_at')
+        if self.many:
+            # the polymorphic manager fetches the products using one query per product type
+            queryset = queryset.prefetch_related('items__product')
         return queryset
 
+    def paginate_queryset(self, queryset):
+        orders = super().paginate_queryset(queryset)
+        if orders is not None:
+            self.prepare_orders(orders)
+        return orders
+
+    def prepare_orders(self, orders):
+        """
+        Prepare the orders of the current page for serialization, so that the number of queries
+        does not depend on the number of orders. Their URLs share the URL of the order summary,
+        hence it is resolved only once. The URLs and the translations of the ordered products
+        are fetched in bulk; those URLs are handed over to the serializers by their context.
+        """
+        summary_url = OrderModel.objects.get_summary_url()
+        products = {}
+        for order in orders:
+            order._summary_url = summary_url
+            products.update((item.product_id, item.product) for item in order.items.all() if item.product)
+        products = sorted(products.values(), key=lambda product: (product.__class__.__name__, product.pk))
+        for product_class, group in groupby(products, key=lambda product: product.__class__):
+            if hasattr(product_class, 'translations'):
+                prefetch_related_objects(list(group), 'translations')
+        if hasattr(ProductModel, 'get_absolute_urls'):
+            self.product_urls = ProductModel.get_absolute_urls(products, get_language())
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if hasattr(self, 'product_urls'):
+            context.update(product_urls=self.product_urls)
+        return context
+
+    def get_object(self):
+        # the order is required by the serializer and by the renderer context
+        if not hasattr(self, '_order'):
+            self._order = super().get_object()
+        return self._order
+
     def get_serializer_class(self):
         if self.many:
             return self.list_serializer_class
@@ -82,8 +126,10 @@ class OrderView(mixins.ListModelMixin, mixins.RetrieveModelMixin, mixins.UpdateM
         assert self.many is False, "This method can be called for detail views only"
         lapse = timezone.now() - self.last_order_lapse
         current_order = self.get_object()
-        last_order = self.get_queryset().first()
-        return current_order.id == last_order.id and current_order.created_at > lapse
+        if current_order.created_at <= lapse:
+            return False
+        newer_orders = OrderModel.objects.filter(customer_id=current_order.customer_id, pk__gt=current_order.pk)
+        return not newer_orders.exists()
 
     @property
     def allowed_methods(self):
@@ -1,11 +1,75 @@
 from django.contrib.sitemaps import Sitemap
+from django.core.paginator import Page, Paginator
 from shop.models.product import ProductModel
 
 
+class ChunkedPaginator(Paginator):
+    """
+    Paginator whose pages do not evaluate their slice of the queryset at once. Instead the
+    products are fetched in chunks using ``queryset.iterator()``, and for each chunk the
+    canonical URLs are resolved in bulk by the given ``resolve_chunk`` callback.
+    """
+    def __init__(self, object_list, per_page, chunk_size, resolve_chunk, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.chunk_size = chunk_size
+        self.resolve_chunk = resolve_chunk
+
+    def _get_page(self, object_list, number, paginator):
+        return Page(self.iterate(object_list), number, paginator)
+
+    def iterate(self, queryset):
+        chunk = []
+        for item in queryset.iterator(chunk_size=self.chunk_size):
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                self.resolve_chunk(chunk)
+                yield from chunk
+                chunk = []
+        if chunk:
+            self.resolve_chunk(chunk)
+            yield from chunk
+
+
 class ProductsSitemap(Sitemap):
+    """
+    Sitemap for all active products. Since a catalog may contain many thousands of products, this
+    sitemap is split into shards of ``limit`` products each. When used with the sitemap index view
+    :func:`django.contrib.sitemaps.views.index`, each shard is referred by its own URL. Remember
+    that with ``i18n`` enabled, each shard contains one URL per product and language.
+
+    Use ``./manage.py shop render-sitemap`` to prerender these shards into the storage.
+    """
     changefreq = 'weekly'
     priority = 0.7
     i18n = True
+    limit = 5000
+    chunk_size = 500
+
+    def __init__(self):
+        self._locations = {}
 
     def items(self):
-        return ProductModel.objects.all()
+        return ProductModel.objects.indexable().order_by('pk')
+
+    @property
+    def paginator(self):
+        return ChunkedPaginator(self.items(), self.limit, self.chunk_size, self.resolve_locations)
+
+    def resolve_locations(self, products):
+        """
+        Resolve the canonical URLs of a chunk of products for the currently active language.
+        """
+        get_absolute_urls = getattr(ProductModel, 'get_absolute_urls', None)
+        if callable(get_absolute_urls):
+            self._locations = get_absolute_urls(products)
+        else:
+            self._locations = {product.pk: product.get_absolute_url() for product in products}
+
+    def location(self, product):
+        try:
+            return self._locations[product.pk]
+        except KeyError:
+            return product.get_absolute_url()
+
+    def lastmod(self, product):
+        return product.updated_at
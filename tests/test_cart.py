@@ -1,10 +1,15 @@
 import pytest
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.messages.storage import default_storage
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from shop.conf import app_settings
 from shop.models.cart import CartModel
 from shop.models.defaults.customer import Customer
+from shop.models.fields import JSONText
 from shop.modifiers.pool import CartModifiersPool
+from shop.money import MoneyMaker
+from shop.serializers.cart import CartItems, CartSerializer, ExtraCartRow, get_cart_summary
 from shop.views.cart import CartViewSet, WatchViewSet
 from shop.modifiers.pool import cart_modifiers_pool
 from rest_framework.reverse import reverse
@@ -51,6 +56,21 @@ def test_list_cart(api_rf, filled_cart):
     assert response.data['total'] == str(filled_cart.total)
 
 
+@pytest.mark.django_db
+def test_fetch_dropdown(api_rf, filled_cart):
+    request = api_rf.get('/shop/api/cart/fetch-dropdown')
+    request.customer = filled_cart.customer
+    response = CartViewSet.as_view({'get': 'fetch_dropdown'})(request)
+    assert response.status_code == 200
+    assert len(response.data['items']) == 1
+
+    # the lean mode renders the same items as when fetching and updating them again
+    cart = CartModel.objects.get(pk=filled_cart.pk)
+    serializer = CartSerializer(cart, context={'request': response.renderer_context['request']},
+                                label='dropdown', with_items=CartItems.unsorted)
+    assert response.data['items'] == serializer.data['items']
+
+
 @pytest.mark.django_db
 def test_unowned_cart(customer_factory, api_rf, filled_cart):
     request = api_rf.get('/shop/api/cart')
@@ -145,3 +165,63 @@ def test_payment_modifiers_with_same_processors(api_rf, filled_cart):
         for modifier_for_id in cart_modifiers_pool.get_payment_modifiers():
             if modifier_to_test.is_active(modifier_for_id.identifier):
                 assert modifier_for_id.identifier == modifier_to_test.identifier
+
+
+@pytest.mark.django_db
+def test_update_extra(filled_cart):
+    filled_cart.extra = {'payment_modifier': 'prepayment', 'rows': [1, 2, 3]}
+    filled_cart.save()
+    cart = CartModel.objects.get(pk=filled_cart.pk)
+    assert isinstance(cart.__dict__['extra'], JSONText)  # not decoded yet
+    cart.save()
+    cart.update_extra(shipping_modifier='postal')
+    assert cart.extra['shipping_modifier'] == 'postal'
+    cart = CartModel.objects.get(pk=filled_cart.pk)
+    assert cart.extra == {'payment_modifier': 'prepayment', 'rows': [1, 2, 3], 'shipping_modifier': 'postal'}
+
+
+@pytest.mark.django_db
+def test_update_writes_changed_extra(rf, filled_cart, monkeypatch):
+    def pre_process_cart(self, cart, request, raise_exception=False):
+        cart.extra['payment_modifier'] = 'prepayment'
+
+    modifier_class = type(cart_modifiers_pool.get_all_modifiers()[0])
+    monkeypatch.setattr(modifier_class, 'pre_process_cart', pre_process_cart)
+    # meanwhile another request stores a different key
+    CartModel.objects.get(pk=filled_cart.pk).update_extra(shipping_modifier='postal')
+    request = rf.get('/my-cart')
+    filled_cart._dirty = True
+    filled_cart.update(request)
+    cart = CartModel.objects.get(pk=filled_cart.pk)
+    assert cart.extra['payment_modifier'] == 'prepayment'
+    assert cart.extra['shipping_modifier'] == 'postal'
+
+
+def test_extra_cart_row():
+    EUR = MoneyMaker('EUR')
+    row = ExtraCartRow(label="plus 19% VAT", amount=EUR('1.90'))
+    assert row.to_dict() == {'label': "plus 19% VAT", 'amount': '{:f}'.format(EUR('1.90'))}
+    assert not hasattr(row, '__dict__')
+
+    # rows may still be created from a dictionary
+    legacy_row = ExtraCartRow({'label': "plus 19% VAT", 'amount': EUR('1.90')})
+    assert legacy_row.data == row.to_dict()
+
+
+@pytest.mark.django_db
+def test_cart_summary(rf, filled_cart):
+    request = rf.get('/')
+    request.customer = filled_cart.customer
+    cart_summary = get_cart_summary(request)
+    assert get_cart_summary(request) is cart_summary
+    lazy_data = cart_summary.lazy_data(label='cart', with_items=CartItems.arranged)
+    assert cart_summary._representations == {}  # not evaluated yet
+    assert len(lazy_data['items']) == 1
+
+    # further representations are taken from the cart serialized before
+    with CaptureQueriesContext(connection) as context:
+        assert cart_summary.get_data(label='cart', with_items=CartItems.arranged)['items'] == lazy_data['items']
+        data = cart_summary.get_data(label='dropdown')
+        assert 'items' not in data
+        assert data['num_items'] == lazy_data['num_items']
+    assert len(context.captured_queries) == 0
@@ -1,8 +1,13 @@
 from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from shop.cms_menus import CatalogMenu
 from shop.models.cart import CartModel, CartItemModel
 from shop.models.customer import CustomerModel
-from shop.views.catalog import ProductListView, ProductRetrieveView, AddToCartView
+from shop.views.catalog import (
+    ProductListView, ProductRetrieveView, ProductSelectView, AddToCartView,
+    SelectResultsPagination)
 import pytest
 
 
@@ -19,6 +24,64 @@ def test_catalog_list(commodity_factory, rf):
     assert response.data['results'][0]['product_url'] == request.path + product.slug
 
 
+@pytest.mark.django_db
+def test_catalog_list_num_queries(commodity_factory, rf):
+    """
+    The number of queries to render the catalog's list view must not grow with its page size
+    """
+    def count_queries(limit):
+        request = rf.get('/catalog/', {'limit': limit})
+        request.current_page = product.cms_pages.first()
+        with CaptureQueriesContext(connection) as context:
+            response = ProductListView.as_view()(request)
+            response.render()
+        assert len(response.data['results']) == limit
+        return len(context.captured_queries)
+
+    product = commodity_factory()
+    for _ in range(9):
+        commodity_factory()
+    count_queries(1)  # warm up caches, such as the one for content types
+    assert count_queries(2) == count_queries(10)
+
+
+@pytest.mark.django_db
+def test_catalog_menu_entries(commodity_factory):
+    product = commodity_factory()
+    page = product.cms_pages.first()
+    menu = CatalogMenu(renderer=None)
+    entries = menu.get_entries(page.pk, 'en')
+    assert entries == [(product.product_name, product.get_absolute_url(), product.slug)]
+
+
+@pytest.mark.django_db
+def test_stock_update_keeps_catalog_caches(commodity_factory):
+    product = commodity_factory()
+    product.quantity = 7
+    with CaptureQueriesContext(connection) as context:
+        product.save(update_fields=['quantity'])
+    assert len(context.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_product_select(commodity_factory, rf):
+    product = commodity_factory(product_code='select-1')
+    for _ in range(3):
+        commodity_factory()
+    request = rf.get('/select_product/', {'term': 'select'})
+    response = ProductSelectView.as_view()(request)
+    response.render()
+    assert response.data == {'results': [{'id': product.id, 'text': product.product_name}], 'more': False}
+
+    class SmallPagination(SelectResultsPagination):
+        page_size = 2
+
+    response = ProductSelectView.as_view(pagination_class=SmallPagination)(rf.get('/select_product/'))
+    response.render()
+    assert len(response.data['results']) == 2
+    assert response.data['more'] is True
+
+
 @pytest.mark.django_db
 def test_catalog_detail(commodity_factory, customer_factory, rf):
     product = commodity_factory()
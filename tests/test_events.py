@@ -0,0 +1,32 @@
+import pytest
+from django.db import transaction
+
+from shop import events
+
+
+@pytest.mark.django_db(transaction=True)
+def test_events_are_batched_per_transaction():
+    backend = events.InMemoryEventBackend()
+    bus = events.EventBus(backend)
+
+    # outside of a transaction, events are published immediately
+    bus.emit(events.EMAIL_QUEUED)
+    assert backend.batches == [(events.CHANNEL, [events.EMAIL_QUEUED])]
+    backend.clear()
+
+    with transaction.atomic():
+        bus.emit(events.EMAIL_QUEUED)
+        bus.emit(events.STOCK_CHANGED, product=1)
+        bus.emit(events.EMAIL_QUEUED)
+        assert backend.batches == []
+    assert backend.batches == [(events.CHANNEL, [events.EMAIL_QUEUED, '{"event": "stock_changed", "product": 1}'])]
+    backend.clear()
+
+    # events of rolled back transactions are not published
+    with pytest.raises(RuntimeError):
+        with transaction.atomic():
+            bus.emit(events.EMAIL_QUEUED)
+            raise RuntimeError
+    with transaction.atomic():
+        bus.emit(events.CART_CONVERTED, cart=1, order=2)
+    assert backend.messages == ['{"cart": 1, "event": "cart_converted", "order": 2}']
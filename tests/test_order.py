@@ -1,6 +1,8 @@
 import pytest
 from bs4 import BeautifulSoup
 from django.core.mail import EmailMessage
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.dateparse import parse_datetime
 from django.utils.timezone import datetime
@@ -8,7 +10,10 @@ from post_office.models import Email
 from shop.models.cart import CartItemModel
 from shop.models.order import OrderModel, OrderItemModel
 from shop.models.delivery import DeliveryModel, DeliveryItemModel
-from shop.models.notification import Notify
+from shop.models.notification import Notify, notification_rules
+from shop.models.sequence import NumberSequence
+from shop.pages import get_page_url, invalidate_page_urls
+from shop.transition import get_notification_executor, transition_change_notification
 from shop.views.checkout import CheckoutViewSet
 from shop.views.order import OrderView
 
@@ -63,6 +68,9 @@ def test_purchase(api_rf, empty_cart, commodity_factory, notification_factory):
     assert order.subtotal == empty_cart.subtotal
     assert order.extra['payment_modifier'] == 'forward-fund-payment'
     assert order.extra['shipping_modifier'] == 'self-collection'
+    assert order.extra['rows']['modifiers'] == ['include-taxes']
+    assert isinstance(order.extra['rows']['amounts'][0], int)
+    extra_rows = dict(order.extra_rows)
     assert empty_cart.items.count() == 0
 
     # check that a confirmation email has been queued
@@ -73,6 +81,7 @@ def test_purchase(api_rf, empty_cart, commodity_factory, notification_factory):
     assert product.product_name in message.body
     assert "Subtotal: {}".format(order.subtotal) in message.body
     assert "Total: {}".format(order.total) in message.body
+    assert "{label}: {amount}".format(**extra_rows['include-taxes']) in message.body
     return order
 
 
@@ -90,6 +99,25 @@ def test_addendum(api_rf, order):
     assert addendum[0][1] == "client comment"
 
 
+@pytest.mark.django_db
+def test_is_last_order(api_rf, order):
+    def is_last(order):
+        view = OrderView(many=False)
+        view.request = api_rf.get('/pages/order')
+        view.request.user = order.customer.user
+        view.request.customer = order.customer
+        view.kwargs = {'slug': order.get_number()}
+        return view.is_last()
+
+    assert is_last(order) is True
+    newer_order = OrderModel.objects.get(pk=order.pk)
+    newer_order.pk = newer_order.number = None
+    newer_order.get_or_assign_number()
+    newer_order.save()
+    assert is_last(order) is False
+    assert is_last(newer_order) is True
+
+
 @pytest.fixture(name='paid_order')
 @pytest.mark.django_db
 def test_add_forward_fund(admin_client, order):
@@ -177,6 +205,8 @@ def test_fulfill_order_partially(admin_client, paid_order):
     delivery_item = DeliveryItemModel.objects.filter(delivery=delivery).first()
     delivery_item.item_id == order_item.id
     delivery_item.quantity == 1
+    assert OrderModel.objects.with_unfulfilled_items().get(pk=order.pk).unfulfilled_items == 2
+    assert OrderModel.objects.get(pk=order.pk).unfulfilled_items == 2
     response = admin_client.get(url)
     assert response.status_code == 200
     assert order.status == 'pack_goods'
@@ -223,6 +253,126 @@ def test_fulfill_order_partially(admin_client, paid_order):
     delivery_item = DeliveryItemModel.objects.filter(delivery=delivery).first()
     delivery_item.item_id == order_item.id
     delivery_item.quantity == 2
+    assert OrderModel.objects.with_unfulfilled_items().get(pk=order.pk).unfulfilled_items == 0
+
+
+@pytest.mark.django_db
+def test_order_list_queries(api_rf, order, registered_customer):
+    # let the registered customer own the given order and three copies of it
+    for _ in range(4):
+        order_items = list(order.items.all())
+        order.pk = order.number = None
+        order.customer = registered_customer
+        order.get_or_assign_number()
+        order.save()
+        for order_item in order_items:
+            order_item.pk = None
+            order_item.order = order
+            order_item.save()
+
+    def count_queries(limit):
+        request = api_rf.get('/pages/order', {'limit': limit}, HTTP_ACCEPT='application/json')
+        request.user = registered_customer.user
+        request.customer = registered_customer
+        with CaptureQueriesContext(connection) as context:
+            response = OrderView.as_view()(request)
+        assert response.status_code == 200
+        assert len(response.data['results']) == limit
+        assert response.data['results'][0]['url'].startswith(OrderModel.objects.get_summary_url())
+        return len(context.captured_queries)
+
+    count_queries(4)  # warm up the caches
+    assert count_queries(1) == count_queries(4)
+
+
+@pytest.mark.django_db
+def test_summary_url_is_cached():
+    invalidate_page_urls()
+    summary_url = OrderModel.objects.get_summary_url()
+    with CaptureQueriesContext(connection) as context:
+        assert OrderModel.objects.get_summary_url() == summary_url
+        assert get_page_url('shop-order') == summary_url
+    assert len(context.captured_queries) == 0
+
+    # publishing a CMS page invalidates the cached URLs
+    invalidate_page_urls()
+    with CaptureQueriesContext(connection) as context:
+        assert OrderModel.objects.get_summary_url() == summary_url
+    assert len(context.captured_queries) > 0
+
+
+@pytest.mark.django_db
+def test_number_sequence():
+    assert NumberSequence.objects.next_value('test', initial=lambda: 41) == 42
+    assert NumberSequence.objects.next_value('test', initial=lambda: 0) == 43
+    assert NumberSequence.objects.next_value('other') == 1
+
+
+@pytest.mark.django_db
+def test_fulfill_orders(paid_order):
+    deliveries = OrderModel.fulfill_orders([paid_order])
+    assert len(deliveries) == 1
+    assert deliveries[0].order_id == paid_order.pk
+    assert deliveries[0].shipping_method == paid_order.extra['shipping_modifier']
+    assert deliveries[0].number == 1
+    assert deliveries[0].get_number() == paid_order.get_number() + " / 1"
+    delivered = {item.item_id: item.quantity for item in DeliveryItemModel.objects.filter(delivery=deliveries[0])}
+    assert delivered == {item.pk: item.quantity for item in paid_order.items.all()}
+    assert OrderModel.objects.with_unfulfilled_items().get(pk=paid_order.pk).unfulfilled_items == 0
+
+    # fulfilled orders are skipped
+    assert OrderModel.fulfill_orders([paid_order]) == []
+
+
+@pytest.mark.django_db
+def test_fulfill_unpaid_orders(order):
+    assert order.is_fully_paid() is False
+    assert OrderModel.fulfill_orders([order]) == []
+    assert not DeliveryModel.objects.filter(order=order).exists()
+
+
+@pytest.mark.django_db
+def test_notification_rules(notification_factory, email_template_factory):
+    notification = notification_factory(transition_target='payment_confirmed', notify=Notify.VENDOR)
+    translated_template = email_template_factory(
+        language='de', default_template=notification.mail_template)
+    rules = notification_rules.get_rules('payment_confirmed')
+    assert len(rules) == 1
+    assert rules[0].get_mail_template('de') == translated_template
+    assert rules[0].get_mail_template('en') == notification.mail_template
+    assert rules[0].open_attachments() == {}
+
+    # rules are looked up without querying the database
+    with CaptureQueriesContext(connection) as context:
+        assert notification_rules.get_rules('payment_confirmed') == rules
+    assert len(context.captured_queries) == 0
+
+    # changing a notification invalidates the rules
+    notification.transition_target = 'order_canceled'
+    notification.save()
+    assert notification_rules.get_rules('payment_confirmed') == []
+    assert len(notification_rules.get_rules('order_canceled')) == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_notifications_sent_after_commit(settings, order):
+    settings.SHOP_NOTIFICATION_WORKERS = 1
+    get_notification_executor.cache_clear()
+    Email.objects.all().delete()
+    try:
+        # a rolled back transition does not notify anybody
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                transition_change_notification(order)
+                raise RuntimeError("rollback")
+
+        with transaction.atomic():
+            transition_change_notification(order)
+            assert Email.objects.count() == 0
+        get_notification_executor().shutdown(wait=True)
+        assert Email.objects.count() == 1
+    finally:
+        get_notification_executor.cache_clear()
 
 
 def _extract_form_data(html_content):
@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from shop.models.search import ProductIndexTask
+from shop.search.base import get_version_cache_key
+from shop.search.embedded import EmbeddedSearchBackend, TextAnalyzer
+from shop.search.mixins import SearchResultSerializer
+import pytest
+
+
+@pytest.mark.django_db
+def test_enqueue_coalesces_products():
+    ProductIndexTask.objects.enqueue([1, 2])
+    ProductIndexTask.objects.filter(product_id=2).update(attempts=3, last_error="timeout")
+    ProductIndexTask.objects.enqueue([2, 3])
+    assert sorted(ProductIndexTask.objects.values_list('product_id', flat=True)) == [1, 2, 3]
+    task = ProductIndexTask.objects.get(product_id=2)
+    assert task.attempts == 0
+    assert task.last_error == ''
+    assert ProductIndexTask.objects.pending(max_attempts=1).count() == 3
+
+
+def test_text_analyzer():
+    analyzer = TextAnalyzer({
+        'tokenizer': 'standard',
+        'filter': ['lowercase', 'asciifolding', 'stop'],
+        'char_filter': ['html_strip'],
+    })
+    assert analyzer.analyze("<p>The Crème of the <b>Crop</b></p>") == ['creme', 'crop']
+
+
+@pytest.mark.django_db
+def test_embedded_search(commodity_factory, tmp_path):
+    product = commodity_factory(product_name="Red leather shoes")
+    other = commodity_factory(product_name="Blue woollen hat")
+    backend = EmbeddedSearchBackend(str(tmp_path / 'search-index.sqlite3'))
+    assert backend.index_products([product.pk, other.pk]) == {}
+    document = backend.get_document('en')
+    search = document.search().query('multi_match', query="leath", fields=['product_name'], type='bool_prefix')
+    assert search.count() == 1
+    hit = next(iter(search))
+    assert hit.meta.id == product.pk
+    assert hit.is_stale() is False
+    assert list(search.to_queryset()) == [product]
+    assert document.search()[:1].count() == 2
+    assert len(list(document.search()[:1])) == 1
+    assert document.search().query('match', product_name="hat").count() == 1
+    assert document.search().query('term', product_code={'value': "hat"}).count() == 1
+
+
+@pytest.mark.django_db
+def test_search_results_from_source(commodity_factory, tmp_path, api_rf, django_assert_num_queries):
+    product = commodity_factory(product_name="Red leather shoes")
+    backend = EmbeddedSearchBackend(str(tmp_path / 'search-index.sqlite3'))
+    assert backend.index_products([product.pk]) == {}
+    search = backend.get_document('en').search().query('multi_match', query="leather", fields=['product_name'])
+    request = api_rf.get('/search/', {'q': "leather"})
+    with django_assert_num_queries(0):
+        data = SearchResultSerializer(search[:10], many=True, context={'request': request}).data
+    assert [item['id'] for item in data] == [product.pk]
+    assert 'media' in data[0]
+
+    # once the product has been modified, its outdated summary is serialized from the database
+    cache.set(get_version_cache_key(product.pk), 0)
+    with CaptureQueriesContext(connection) as queries:
+        data = SearchResultSerializer(search[:10], many=True, context={'request': request}).data
+    assert queries.captured_queries
+    assert [item['id'] for item in data] == [product.pk]
@@ -207,6 +207,11 @@ SHOP_ORDER_WORKFLOWS = [
     'shop.shipping.workflows.PartialDeliveryWorkflowMixin',
 ]
 
+# tests run inside transactions, which are never committed
+SHOP_NOTIFICATION_WORKERS = 0
+
+SHOP_EVENT_BACKEND = 'shop.events.InMemoryEventBackend'
+
 AUTH_USER_MODEL = 'email_auth.User'
 
 AUTHENTICATION_BACKENDS = [